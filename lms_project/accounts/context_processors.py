@@ -0,0 +1,3 @@
+def user_role(request):
+    """Make the role resolved by ``UserRoleMiddleware`` available to templates."""
+    return {'user_role': getattr(request, 'role', None)}
@@ -0,0 +1,36 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseForbidden
+
+
+def role_required(*roles, message="Access denied."):
+    """
+    Allow the view only to logged-in users whose ``request.role`` is one of
+    ``roles``. Works on both sync and async views.
+    """
+    def check(request):
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        if request.role not in roles:
+            return HttpResponseForbidden(message)
+        return None
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                return check(request) or await view_func(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            return check(request) or view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+teacher_required = role_required('TEACHER', message="Access denied: Teacher only.")
+student_required = role_required('STUDENT', message="Access denied: Students only.")
+ta_required = role_required('TA', message="Access denied: TA only.")
@@ -0,0 +1,72 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from lms_project.loadtest import percentile
+
+# Failed logins only touch the throttle's counters, so the benchmark keeps them
+# in a cache of its own, which it can clear without emptying the shared one.
+BENCH_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-login'}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the CPU time and latency of failed logins that reach the password "
+        "hasher, against those the login throttle rejects first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=50, help="Attempts per mode.")
+        parser.add_argument('--username', default='bench_login_target',
+                            help="Username to guess passwords for; need not exist.")
+
+    def handle(self, *args, **options):
+        # The test client sends 'Host: testserver', which only the test runner allows.
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        attempts = options['attempts']
+
+        self.stdout.write(f"{'':<10} {'reqs':>6} {'status':>7} {'cpu ms':>8} {'mean':>8} {'p95':>8}")
+        hashed = self.run(attempts, options['username'], dict(settings.LOGIN_THROTTLE, ENABLED=False))
+        # Limits of 1 make every attempt after the first a rejection.
+        rejected = self.run(attempts, options['username'], dict(
+            settings.LOGIN_THROTTLE, ENABLED=True, MAX_FAILURES_PER_IP=1, MAX_FAILURES_PER_USERNAME=1,
+        ), warmup=1)
+        for name, row in (('hashed', hashed), ('rejected', rejected)):
+            self.stdout.write(
+                f"{name:<10} {row['requests']:>6} {row['status']:>7} {row['cpu_ms']:>8.2f} "
+                f"{row['mean_ms']:>8.2f} {row['p95_ms']:>8.2f}"
+            )
+        if rejected['cpu_ms']:
+            self.stdout.write(f"A rejected attempt costs {hashed['cpu_ms'] / rejected['cpu_ms']:.0f}x less CPU.")
+
+    def run(self, attempts, username, throttle, warmup=0):
+        client = Client(REMOTE_ADDR='203.0.113.7')
+        data = {'username': username, 'password': 'wrong password'}
+        url = reverse('login')
+        cpu, wall, statuses = [], [], set()
+        with override_settings(LOGIN_THROTTLE=throttle, CACHES=BENCH_CACHES):
+            cache.clear()
+            for _ in range(warmup):
+                client.post(url, data)
+            for _ in range(attempts):
+                cpu_start, wall_start = time.process_time(), time.perf_counter()
+                response = client.post(url, data)
+                cpu.append(time.process_time() - cpu_start)
+                wall.append(time.perf_counter() - wall_start)
+                statuses.add(response.status_code)
+        if len(statuses) != 1:
+            raise CommandError(f"Expected one status per mode, got {sorted(statuses)}.")
+
+        ms = [t * 1000 for t in wall]
+        return {
+            'requests': attempts,
+            'status': statuses.pop(),
+            'cpu_ms': statistics.fmean(cpu) * 1000,
+            'mean_ms': statistics.fmean(ms),
+            'p95_ms': percentile(ms, 95),
+        }
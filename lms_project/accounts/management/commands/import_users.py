@@ -0,0 +1,149 @@
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from accounts.models import UserTable
+from courses import stats
+from courses.models import Course, Enrollment
+
+VALID_ROLES = {code for code, _ in UserTable.ROLES}
+
+
+def _init_worker():
+    # Needed when worker processes are spawned rather than forked.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lms_project.settings')
+    django.setup()
+
+
+def _hash_password(raw_password):
+    # Rows without a password get an unusable one (no hashing needed);
+    # those users set theirs through a password reset.
+    return make_password(raw_password or None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users, roles and enrollments from a CSV file with the columns "
+        "username, email, password, role, courses (course IDs separated by ';'). "
+        "Existing usernames are skipped; their enrollments are still added. "
+        "Later rows repeating a username are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Processes used to hash passwords.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.course_ids = set(Course.objects.values_list('id', flat=True))
+        self.totals = {'rows': 0, 'users': 0, 'enrollments': 0, 'skipped': 0}
+        self.enrolled_courses = set()
+        # Usernames seen in earlier rows. Batch N+1 is prepared before batch N
+        # is written, so the database can't tell it about batch N's users.
+        self.seen = set()
+        self.start = time.monotonic()
+
+        try:
+            f = open(options['csv_file'], newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(exc)
+
+        # Forked workers must not share the parent's database connection.
+        connections.close_all()
+        with f, ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            reader = csv.DictReader(f)
+            missing = {'username', 'email', 'password', 'role', 'courses'} - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+
+            # Hash batch N+1 in the pool while batch N is written to the database.
+            pending = None
+            while True:
+                rows = list(itertools.islice(reader, batch_size))
+                if not rows:
+                    break
+                batch = self.prepare(rows)
+                hashed = pool.map(_hash_password, [row['password'] for row in batch['new']], chunksize=16)
+                if pending:
+                    self.write(*pending)
+                pending = (batch, hashed)
+            if pending:
+                self.write(*pending)
+
+        # bulk_create sends no signals, so recount the courses that got enrollments.
+        stats.rebuild(self.enrolled_courses)
+        elapsed = time.monotonic() - self.start
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {self.totals['rows']} rows in {elapsed:.1f}s ({self.totals['rows'] / elapsed:.0f} rows/s), "
+            f"{self.totals['users']} users created, {self.totals['enrollments']} enrollments processed, "
+            f"{self.totals['skipped']} rows skipped."
+        ))
+
+    def prepare(self, rows):
+        """Clean a batch of rows and split it into new and existing usernames."""
+        by_username = {}
+        for row in rows:
+            username = (row['username'] or '').strip()
+            if not username or username in self.seen:
+                self.totals['skipped'] += 1
+                continue
+            self.seen.add(username)
+            role = (row['role'] or '').strip().upper()
+            course_ids = set()
+            for value in (row['courses'] or '').split(';'):
+                if value.strip().isdigit() and int(value) in self.course_ids:
+                    course_ids.add(int(value))
+            by_username[username] = {
+                'username': username,
+                'email': (row['email'] or '').strip(),
+                'password': row['password'],
+                'role': role if role in VALID_ROLES else 'STUDENT',
+                'courses': course_ids,
+            }
+
+        existing = set(User.objects.filter(username__in=by_username).values_list('username', flat=True))
+        return {
+            'size': len(rows),
+            'rows': list(by_username.values()),
+            'new': [row for username, row in by_username.items() if username not in existing],
+        }
+
+    def write(self, batch, hashed_passwords):
+        new_rows = batch['new']
+        users = [
+            User(username=row['username'], email=row['email'], password=password)
+            for row, password in zip(new_rows, hashed_passwords)
+        ]
+
+        with transaction.atomic():
+            User.objects.bulk_create(users, ignore_conflicts=True)
+            ids = dict(User.objects.filter(
+                username__in=[row['username'] for row in batch['rows']]
+            ).values_list('username', 'id'))
+
+            UserTable.objects.bulk_create(
+                [UserTable(user_id=ids[row['username']], role=row['role']) for row in new_rows],
+                ignore_conflicts=True,
+            )
+            enrollments = [
+                Enrollment(student_id=ids[row['username']], course_id=course_id)
+                for row in batch['rows'] for course_id in row['courses']
+            ]
+            Enrollment.objects.bulk_create(enrollments, ignore_conflicts=True)
+        self.enrolled_courses.update(e.course_id for e in enrollments)
+
+        self.totals['rows'] += batch['size']
+        self.totals['users'] += len(users)
+        self.totals['enrollments'] += len(enrollments)
+        elapsed = time.monotonic() - self.start
+        self.stdout.write(f"{self.totals['rows']} rows ({self.totals['rows'] / elapsed:.0f} rows/s)")
@@ -0,0 +1,33 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .roles import get_user_role, aget_user_role
+
+
+class UserRoleMiddleware:
+    """
+    Resolve the user's role once per request and expose it as ``request.role``.
+
+    Under ASGI the user is loaded with the async auth API and set as
+    ``request.user``, so async views and their templates never trigger a
+    synchronous database lookup.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request.role = get_user_role(request.user)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.user = await request.auser()
+        request.role = await aget_user_role(request.user)
+        return await self.get_response(request)
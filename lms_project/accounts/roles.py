@@ -0,0 +1,47 @@
+"""
+Per-user role lookup backed by the cache.
+
+``UserTable.role`` is read on nearly every request. It is cached per user
+and dropped whenever the user's ``UserTable`` row is saved or deleted
+(see ``signals.py``); the timeout only bounds staleness for caches that
+are not shared between processes.
+"""
+
+from django.core.cache import cache
+
+from .models import UserTable
+
+ROLE_CACHE_TIMEOUT = 60 * 60
+
+# Cached for users without a UserTable row, so they don't query every time.
+NO_ROLE = ''
+
+
+def role_cache_key(user_id):
+    return f"user:{user_id}:role"
+
+
+def get_user_role(user):
+    """Return the user's role (e.g. ``'TEACHER'``), or None if they have none."""
+    if not user.is_authenticated:
+        return None
+    role = cache.get(role_cache_key(user.pk))
+    if role is None:
+        role = UserTable.objects.filter(user_id=user.pk).values_list('role', flat=True).first() or NO_ROLE
+        cache.set(role_cache_key(user.pk), role, ROLE_CACHE_TIMEOUT)
+    return role or None
+
+
+async def aget_user_role(user):
+    """Async version of ``get_user_role()``."""
+    if not user.is_authenticated:
+        return None
+    role = await cache.aget(role_cache_key(user.pk))
+    if role is None:
+        role = await UserTable.objects.filter(user_id=user.pk).values_list('role', flat=True).afirst() or NO_ROLE
+        await cache.aset(role_cache_key(user.pk), role, ROLE_CACHE_TIMEOUT)
+    return role or None
+
+
+def invalidate_user_role(user_id):
+    cache.delete(role_cache_key(user_id))
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import UserTable
+from .roles import invalidate_user_role
+
+
+@receiver([post_save, post_delete], sender=UserTable)
+def usertable_changed(sender, instance, **kwargs):
+    invalidate_user_role(instance.user_id)
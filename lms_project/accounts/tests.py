@@ -1,3 +1,139 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+
+from courses.models import Course, Enrollment
+from . import throttle
+from .models import UserTable
+
+THROTTLE = {'ENABLED': True, 'WINDOW_SECONDS': 100, 'MAX_FAILURES_PER_IP': 8, 'MAX_FAILURES_PER_USERNAME': 5}
+
+
+@override_settings(
+    LOGIN_THROTTLE=THROTTLE,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle-tests'}},
+)
+class LoginThrottleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1000.0  # the start of window 10
+        patcher = mock.patch.object(throttle.time, 'time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, ip='203.0.113.1'):
+        return RequestFactory().post('/login/', REMOTE_ADDR=ip)
+
+    def fail(self, times, username='alice', ip='203.0.113.1'):
+        for _ in range(times):
+            throttle.record_failure(self.request(ip), username)
+
+    def test_blocks_a_username_at_its_limit(self):
+        self.fail(4)
+        self.assertEqual(throttle.blocked_for(self.request(), 'alice'), 0)
+        self.fail(1)
+        self.assertGreater(throttle.blocked_for(self.request(), 'alice'), 0)
+        # Usernames are compared case-insensitively, from any address.
+        self.assertGreater(throttle.blocked_for(self.request('198.51.100.9'), ' Alice '), 0)
+        self.assertEqual(throttle.blocked_for(self.request('198.51.100.9'), 'bob'), 0)
+
+    def test_blocks_an_address_across_usernames(self):
+        for n in range(8):
+            self.fail(1, username=f'user{n}')
+        self.assertGreater(throttle.blocked_for(self.request(), 'someone-else'), 0)
+        self.assertEqual(throttle.blocked_for(self.request('198.51.100.9'), 'someone-else'), 0)
+
+    def test_previous_window_counts_by_its_overlap(self):
+        self.now = 1090.0
+        self.fail(4)
+        # Window 11, 20s in: 4 * 0.8 + 1 = 4.2 is under the limit of 5.
+        self.now = 1120.0
+        self.fail(1)
+        self.assertEqual(throttle.blocked_for(self.request(), 'alice'), 0)
+        # 4 * 0.8 + 2 = 5.2 is not.
+        self.fail(1)
+        self.assertGreater(throttle.blocked_for(self.request(), 'alice'), 0)
+
+    def assert_retry_after_is_accurate(self):
+        start = self.now
+        wait = throttle.blocked_for(self.request(), 'alice')
+        self.assertGreater(wait, 0)
+        self.now = start + wait - 1
+        self.assertGreater(throttle.blocked_for(self.request(), 'alice'), 0)
+        self.now = start + wait
+        self.assertEqual(throttle.blocked_for(self.request(), 'alice'), 0)
+
+    def test_retry_after_when_the_current_window_is_full(self):
+        self.now = 1010.0
+        self.fail(5)
+        self.assert_retry_after_is_accurate()
+
+    def test_retry_after_while_the_previous_window_slides_out(self):
+        self.now = 1050.0
+        self.fail(10)
+        self.now = 1120.0
+        self.assert_retry_after_is_accurate()
+
+    def test_retry_after_with_failures_in_both_windows(self):
+        self.now = 1060.0
+        self.fail(4)
+        self.now = 1130.0
+        self.fail(3)
+        self.assert_retry_after_is_accurate()
+
+    def test_retry_after_values(self):
+        # 10 failures last window, none this one, halfway in: 10 * 0.5 = 5 is below 5 a moment later.
+        self.assertEqual(throttle._retry_after(10, 0, 50, 5), 1)
+        # 10 last window and 2 in this one, 20s in: 10 * 0.3 + 2 = 5 at 70s, below it after.
+        self.assertEqual(throttle._retry_after(10, 2, 20, 5), 51)
+        # 5 in this window, 10s in: wait out this window, then all of it has to slide out.
+        self.assertEqual(throttle._retry_after(0, 5, 10, 5), 91)
+
+    def test_reset_username_forgets_its_failures(self):
+        self.fail(5)
+        throttle.reset_username('alice')
+        self.assertEqual(throttle.blocked_for(self.request(), 'alice'), 0)
+
+    def test_disabled(self):
+        with override_settings(LOGIN_THROTTLE=dict(THROTTLE, ENABLED=False)):
+            self.fail(20)
+            self.assertEqual(throttle.blocked_for(self.request(), 'alice'), 0)
+        self.assertEqual(throttle.blocked_for(self.request(), 'alice'), 0)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'import-tests'}})
+class ImportUsersTests(TransactionTestCase):
+    # The command closes the database connection before starting its workers,
+    # which a TestCase transaction would not survive.
+
+    def import_csv(self, text, batch_size):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write(text)
+        self.addCleanup(os.remove, f.name)
+        out = io.StringIO()
+        call_command('import_users', f.name, batch_size=batch_size, workers=1, stdout=out)
+        return out.getvalue()
+
+    def test_usernames_repeated_across_batches_are_skipped(self):
+        teacher = User.objects.create_user('teacher', password='x')
+        course = Course.objects.create(title='Course', description='', teacher=teacher)
+        output = self.import_csv(
+            'username,email,password,role,courses\n'
+            'alice,a@example.com,,student,\n'
+            'bob,b@example.com,,teacher,\n'
+            f'alice,other@example.com,,ta,{course.id}\n'
+            'alice,again@example.com,,admin,\n',
+            batch_size=2,
+        )
+        self.assertIn('2 users created', output)
+        self.assertIn('2 rows skipped', output)
+        alice = User.objects.get(username='alice')
+        self.assertEqual(alice.email, 'a@example.com')
+        self.assertEqual(UserTable.objects.get(user=alice).role, 'STUDENT')
+        self.assertFalse(Enrollment.objects.filter(student=alice).exists())
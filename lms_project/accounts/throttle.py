@@ -0,0 +1,99 @@
+"""
+Sliding-window throttle for failed logins, kept in the cache.
+
+Checking a password runs a deliberately slow hash, so a burst of guesses
+can keep every worker busy. Failed attempts are counted per client IP
+and per username in fixed windows of ``LOGIN_THROTTLE['WINDOW_SECONDS']``;
+the count over the last window is estimated as the current window's count
+plus the previous window's, weighted by how much of it still overlaps.
+Once either estimate reaches its limit, ``LoginView`` rejects attempts
+with a 429 before any hashing happens.
+"""
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _config():
+    return settings.LOGIN_THROTTLE
+
+
+def _username_scope(username):
+    # Hashed, so any username makes a valid memcached key.
+    return f"user:{hashlib.sha256(username.strip().lower().encode()).hexdigest()[:32]}"
+
+
+def _scopes(request, username):
+    config = _config()
+    scopes = [(f"ip:{request.META.get('REMOTE_ADDR', '')}", config['MAX_FAILURES_PER_IP'])]
+    if username:
+        scopes.append((_username_scope(username), config['MAX_FAILURES_PER_USERNAME']))
+    return scopes
+
+
+def _key(scope, window):
+    return f"login_throttle:{scope}:{window}"
+
+
+def _counts(scope, now):
+    """``(previous window's count, current window's count, seconds into the current window)``."""
+    size = _config()['WINDOW_SECONDS']
+    window = int(now // size)
+    elapsed = now - window * size
+    counts = cache.get_many([_key(scope, window - 1), _key(scope, window)])
+    return counts.get(_key(scope, window - 1), 0), counts.get(_key(scope, window), 0), elapsed
+
+
+def _retry_after(previous, current, elapsed, limit):
+    """Whole seconds until the estimate is below ``limit`` again, with no further failures."""
+    size = _config()['WINDOW_SECONDS']
+    if current < limit:
+        # Wait for enough of the previous window to slide out.
+        wait = size * (1 - (limit - current) / previous) - elapsed
+    else:
+        # Wait for the current window to become the previous one, and slide out far enough.
+        wait = size - elapsed + size * (1 - limit / current)
+    # At exactly ``wait`` the estimate still equals the limit.
+    return max(1, math.floor(wait) + 1)
+
+
+def blocked_for(request, username):
+    """Seconds the client has to wait before trying to log in as ``username``, or 0."""
+    if not _config().get('ENABLED', True):
+        return 0
+    now = time.time()
+    size = _config()['WINDOW_SECONDS']
+    wait = 0
+    for scope, limit in _scopes(request, username):
+        previous, current, elapsed = _counts(scope, now)
+        if current + previous * (1 - elapsed / size) >= limit:
+            wait = max(wait, _retry_after(previous, current, elapsed, limit))
+    return wait
+
+
+def record_failure(request, username):
+    if not _config().get('ENABLED', True):
+        return
+    size = _config()['WINDOW_SECONDS']
+    window = int(time.time() // size)
+    for scope, _ in _scopes(request, username):
+        key = _key(scope, window)
+        # Kept for two windows: the current one, then as the previous one.
+        if not cache.add(key, 1, size * 2):
+            try:
+                cache.incr(key)
+            except ValueError:  # expired between add() and incr()
+                cache.add(key, 1, size * 2)
+
+
+def reset_username(username):
+    """Forget a username's failures after it logs in successfully."""
+    if not username:
+        return
+    window = int(time.time() // _config()['WINDOW_SECONDS'])
+    scope = _username_scope(username)
+    cache.delete_many([_key(scope, window - 1), _key(scope, window)])
@@ -1,9 +1,12 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth import login, logout, authenticate
+from django.contrib.auth import login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from .forms import UserRegisterForm, LoginForm
 from .models import UserTable
+from .decorators import teacher_required, student_required, ta_required
+from . import throttle
+from .roles import get_user_role
 
 
 # use for redirect based on user role
@@ -21,7 +24,7 @@ def redirect_dashboard(role):
 # REGISTER VIEW
 def RegisterView(request):
     if request.user.is_authenticated:
-        return redirect_dashboard(request.user.usertable.role)
+        return redirect_dashboard(request.role)
 
     if request.method == "POST":
         form = UserRegisterForm(request.POST)
@@ -47,23 +50,30 @@ def RegisterView(request):
 # LOGIN VIEW 
 def LoginView(request):
     if request.user.is_authenticated:
-        return redirect_dashboard(request.user.usertable.role)
+        return redirect_dashboard(request.role)
 
     if request.method == "POST":
+        username = request.POST.get("username", "")
+        # Checked before the form runs the password hash.
+        retry_after = throttle.blocked_for(request, username)
+        if retry_after:
+            messages.error(request, f"Too many failed login attempts. Try again in {retry_after} seconds.")
+            form = LoginForm(initial={"username": username})
+            response = render(request, "accounts/login.html", {"form": form}, status=429)
+            response["Retry-After"] = str(retry_after)
+            return response
+
         form = LoginForm(request, data=request.POST)
         if form.is_valid():
-            username = form.cleaned_data.get("username")
-            password = form.cleaned_data.get("password")
-
-            user = authenticate(request, username=username, password=password)
-            if user is not None:
-                login(request, user)
-                messages.success(request, f"Welcome back, {user.username}!")
-                return redirect_dashboard(user.usertable.role)
-            else:
-                messages.error(request, "Invalid username or password.")
+            # The form has already authenticated the user.
+            user = form.get_user()
+            throttle.reset_username(username)
+            login(request, user)
+            messages.success(request, f"Welcome back, {user.username}!")
+            return redirect_dashboard(get_user_role(user))
         else:
-            messages.error(request, "Invalid form submission. Please try again.")
+            throttle.record_failure(request, username)
+            messages.error(request, "Invalid username or password.")
     else:
         form = LoginForm()
 
@@ -82,14 +92,14 @@ def logoutView(request):
 def admin_dashboard(request):
     return render(request, 'accounts/admin_dashboard.html')
 
-@login_required
+@teacher_required
 def teacher_dashboard(request):
     return render(request, 'accounts/teacher_dashboard.html')
 
-@login_required
+@ta_required
 def ta_dashboard(request):
     return render(request, 'accounts/ta_dashboard.html')
 
-@login_required
+@student_required
 def student_dashboard(request):
     return render(request, 'accounts/student_dashboard.html')
\ No newline at end of file
@@ -1,15 +1,24 @@
 from django.contrib import admin
-from .models import Course, Lesson, Enrollment, Quiz, Question
+from django.db.models import Q
+from search import index
+from .models import Course, CourseStats, Lesson, Enrollment, Quiz, Question, QuizAttempt, AttemptAnswer, VideoUpload, LessonImport
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     list_display = ('title', 'teacher', 'created_at')
     search_fields = ('title', 'teacher__username')
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the FTS5 index instead of LIKE '%term%' scans when it is available.
+        if not search_term or not index.is_available():
+            return super().get_search_results(request, queryset, search_term)
+        ids = index.matching_ids(search_term, 'course')
+        return queryset.filter(Q(pk__in=ids) | Q(teacher__username__icontains=search_term)), False
+
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
-    list_display = ('title', 'course', 'order')
-    list_filter = ('course',)
+    list_display = ('title', 'course', 'order', 'content_format', 'media_status')
+    list_filter = ('course', 'content_format')
 
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
@@ -22,4 +31,36 @@ class QuizAdmin(admin.ModelAdmin):
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ('text', 'quiz')
-    search_fields = ('text',)
\ No newline at end of file
+    search_fields = ('text',)
+
+
+class AttemptAnswerInline(admin.TabularInline):
+    model = AttemptAnswer
+    extra = 0
+    raw_id_fields = ('question',)
+
+
+@admin.register(QuizAttempt)
+class QuizAttemptAdmin(admin.ModelAdmin):
+    list_display = ('quiz', 'student', 'score', 'total', 'submitted_at')
+    list_select_related = ('quiz', 'student')
+    inlines = [AttemptAnswerInline]
+
+
+@admin.register(VideoUpload)
+class VideoUploadAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'lesson', 'slot', 'size', 'created_by', 'created_at')
+    list_select_related = ('lesson__course', 'created_by')
+
+
+@admin.register(CourseStats)
+class CourseStatsAdmin(admin.ModelAdmin):
+    list_display = ('course', 'enrollment_count', 'completed_count', 'attempt_count', 'open_query_count')
+    list_select_related = ('course',)
+
+
+@admin.register(LessonImport)
+class LessonImportAdmin(admin.ModelAdmin):
+    list_display = ('course', 'created_by', 'status', 'processed', 'total', 'lessons_created', 'created_at')
+    list_filter = ('status',)
+    list_select_related = ('course', 'created_by')
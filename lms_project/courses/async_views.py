@@ -0,0 +1,73 @@
+"""
+Async versions of the dashboard views, served when running under ASGI
+(see ``settings.ASYNC_VIEWS``).
+
+They use the async ORM and start independent lookups together with
+``asyncio.gather`` instead of one after another. Querysets are evaluated
+before rendering, since templates run synchronously.
+"""
+
+import asyncio
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render, redirect
+
+from accounts.decorators import teacher_required, student_required
+from lms_project.pagination import InvalidCursor
+from .models import Course, Enrollment
+from .progress import with_progress
+from .views import catalog_paginator
+
+
+async def all_enrolled_course_ids(user):
+    # Not limited to the page's courses, so it doesn't have to wait for them.
+    return {course_id async for course_id in
+            Enrollment.objects.filter(student=user).values_list('course_id', flat=True)}
+
+
+# ---------------------- STUDENT DASHBOARD ----------------------
+@student_required
+async def student_dashboard(request):
+    """Display available courses with enrollment status, one page at a time."""
+    paginator = catalog_paginator()
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            paginator.decode_cursor(cursor)
+        except InvalidCursor:
+            cursor = None
+
+    (courses, next_cursor), enrolled_ids = await asyncio.gather(
+        paginator.apage(cursor), all_enrolled_course_ids(request.user),
+    )
+
+    return render(request, 'accounts/student_dashboard.html', {
+        'courses': courses,
+        'enrolled_ids': enrolled_ids,
+        'next_cursor': next_cursor,
+    })
+
+
+# ---------------------- Teacher Views ----------------------
+async def teacher_courses(user, *related):
+    return [course async for course in Course.objects.filter(teacher=user).select_related(*related).order_by('-created_at')]
+
+
+@teacher_required
+async def teacher_dashboard(request):
+    courses = await teacher_courses(request.user, 'stats')
+    return render(request, 'accounts/teacher_dashboard.html', {'courses': courses})
+
+
+@login_required
+async def my_courses(request):
+    if request.role == 'STUDENT':
+        enrollments = [e async for e in with_progress(Enrollment.objects.filter(student=request.user))]
+        return render(request, 'courses/my_courses_student.html', {'enrollments': enrollments})
+    elif request.role == 'TEACHER':
+        courses = await teacher_courses(request.user)
+        return render(request, 'courses/my_courses_teacher.html', {'courses': courses})
+    else:
+        messages.info(request, "No courses available for your role.")
+        return redirect('course_list')
@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 from .models import Course, Lesson, Quiz, Question
 
 
@@ -15,16 +16,32 @@ class CourseForm(forms.ModelForm):
 class LessonForm(forms.ModelForm):
     class Meta:
         model = Lesson
-        fields = ['title', 'content', 'order', 'video_1', 'video_2']  # ✅ added video fields
+        fields = ['title', 'content', 'content_format', 'video_1', 'video_2']  # ✅ added video fields
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control'}),
             'content': forms.Textarea(attrs={'class': 'form-control', 'rows': 6}),
-            'order': forms.NumberInput(attrs={'class': 'form-control'}),
+            'content_format': forms.Select(attrs={'class': 'form-select'}),
             'video_1': forms.ClearableFileInput(attrs={'class': 'form-control'}),
             'video_2': forms.ClearableFileInput(attrs={'class': 'form-control'}),
         }
 
 
+class LessonImportForm(forms.Form):
+    archive = forms.FileField(
+        help_text="A .zip of .md or .txt lesson files, imported in file name order. "
+                  "Videos named like a lesson file (03-loops.mp4, 03-loops.2.mp4) are attached to it.",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.zip,application/zip'}),
+    )
+
+    def clean_archive(self):
+        archive = self.cleaned_data['archive']
+        if not archive.name.lower().endswith('.zip'):
+            raise forms.ValidationError("Upload a .zip file.")
+        if archive.size > settings.VIDEO_UPLOAD_MAX_SIZE:
+            raise forms.ValidationError("The archive is too large.")
+        return archive
+
+
 class QuizForm(forms.ModelForm):
     class Meta:
         model = Quiz
@@ -0,0 +1,56 @@
+"""
+Quiz grading against a cached, per-quiz answer key.
+
+The key is compiled from the quiz's questions once and kept in the cache
+until a question of that quiz is saved or deleted (see ``signals.py``),
+so grading a submission does not read any ``Question`` rows.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Question, QuizAttempt, AttemptAnswer
+
+
+def answer_key_cache_key(quiz_id):
+    return f"quiz:{quiz_id}:answer_key"
+
+
+def get_answer_key(quiz_id):
+    """Return ``[(question_id, correct_option), ...]`` for the quiz, in question order."""
+    key = cache.get(answer_key_cache_key(quiz_id))
+    if key is None:
+        key = list(Question.objects.filter(quiz_id=quiz_id).order_by('id').values_list('id', 'correct_option'))
+        cache.set(answer_key_cache_key(quiz_id), key, None)
+    return key
+
+
+def invalidate_answer_key(quiz_id):
+    cache.delete(answer_key_cache_key(quiz_id))
+
+
+def grade_attempt(quiz, student, data):
+    """
+    Grade the submitted ``data`` (``q_<question_id>`` -> option) and save
+    the attempt with all of its answers.
+    """
+    answers = []
+    for question_id, correct_option in get_answer_key(quiz.id):
+        selected = data.get(f"q_{question_id}") or ''
+        answers.append(AttemptAnswer(
+            question_id=question_id,
+            selected_option=selected[:1],
+            is_correct=selected == correct_option,
+        ))
+
+    with transaction.atomic():
+        attempt = QuizAttempt.objects.create(
+            quiz=quiz,
+            student=student,
+            score=sum(a.is_correct for a in answers),
+            total=len(answers),
+        )
+        for answer in answers:
+            answer.attempt = attempt
+        AttemptAnswer.objects.bulk_create(answers)
+    return attempt
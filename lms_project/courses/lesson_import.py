@@ -0,0 +1,204 @@
+"""
+Bulk import of lessons from a zip archive, run by the job worker.
+
+Every ``.md``/``.markdown`` (Markdown) or ``.txt`` (plain text) file in
+the archive becomes a lesson, in file name order, after the course's
+existing lessons. The title is the file's first ``# heading``, or else
+its name without a leading number. A video named like the lesson file
+(``03-loops.mp4``) becomes its first video and one ending in ``.2``
+(``03-loops.2.mp4``) its second.
+
+The archive is read member by member and nothing is extracted to disk;
+videos are copied to storage one at a time, straight from the archive.
+The lessons are then inserted with one ``bulk_create`` in a single
+transaction. That sends no signals, so the work the receivers would do
+(lesson counters, course stats, page cache, search index, media jobs) is
+done here explicitly.
+"""
+
+import posixpath
+import re
+import zipfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.queue import enqueue
+from search import index
+from . import ordering, progress, rendering
+from .media import queue_media_processing
+from .models import Lesson, LessonImport
+from .page_cache import bump_course_version, touch_course_content
+
+TEXT_FORMATS = {'.md': Lesson.FORMAT_MARKDOWN, '.markdown': Lesson.FORMAT_MARKDOWN, '.txt': Lesson.FORMAT_TEXT}
+VIDEO_EXTENSIONS = ('.mp4', '.m4v', '.mov', '.webm', '.ogv')
+MAX_LESSON_BYTES = 2 * 1024 * 1024
+MAX_LESSONS = 500
+PROGRESS_EVERY = 10
+
+_LEADING_NUMBER = re.compile(r'^\d+[\s._-]*')
+_HEADING = re.compile(r'^#\s+(.+?)\s*#*\s*$')
+_NATURAL_PARTS = re.compile(r'(\d+)')
+
+
+class ArchiveError(ValueError):
+    """The archive can't be imported; the message is shown to the teacher."""
+
+
+def natural_key(name):
+    return [int(part) if part.isdigit() else part.lower() for part in _NATURAL_PARTS.split(name)]
+
+
+def read_archive(archive):
+    """
+    List the archive's lessons as ``[(stem, ZipInfo)]`` in lesson order and
+    their videos as ``{(stem, slot): ZipInfo}``, reading only the directory.
+    """
+    texts, videos = [], {}
+    for info in archive.infolist():
+        name = info.filename
+        base = posixpath.basename(name)
+        if info.is_dir() or not base or base.startswith('.') or '__MACOSX/' in name:
+            continue
+        stem, ext = posixpath.splitext(name)
+        ext = ext.lower()
+        if ext in TEXT_FORMATS:
+            if info.file_size > MAX_LESSON_BYTES:
+                raise ArchiveError(f"{name} is larger than {MAX_LESSON_BYTES // 1024 // 1024} MB.")
+            texts.append((stem, info))
+        elif ext in VIDEO_EXTENSIONS:
+            if info.file_size > settings.VIDEO_UPLOAD_MAX_SIZE:
+                raise ArchiveError(f"{name} is larger than the video size limit.")
+            slot = 2 if stem.endswith('.2') else 1
+            videos[(stem[:-2] if slot == 2 else stem, slot)] = info
+    if not texts:
+        raise ArchiveError("The archive has no .md, .markdown or .txt lesson files.")
+    stems = {stem for stem, _ in texts}
+    videos = {key: info for key, info in videos.items() if key[0] in stems}
+    if len(texts) > MAX_LESSONS:
+        raise ArchiveError(f"The archive has {len(texts)} lessons; at most {MAX_LESSONS} can be imported at once.")
+    texts.sort(key=lambda item: natural_key(item[0]))
+    return texts, videos
+
+
+def lesson_from_text(stem, content_format, text):
+    title = _LEADING_NUMBER.sub('', posixpath.basename(stem)).replace('_', ' ').strip() or posixpath.basename(stem)
+    lines = text.lstrip('\ufeff').splitlines()
+    if lines and content_format == Lesson.FORMAT_MARKDOWN:
+        match = _HEADING.match(lines[0])
+        if match:
+            title = match.group(1)
+            text = '\n'.join(lines[1:]).lstrip('\n')
+    lesson = Lesson(title=title[:200], content=text, content_format=content_format)
+    rendering.refresh(lesson)  # bulk_create skips Lesson.save
+    return lesson
+
+
+def save_video(archive, info, lesson, slot):
+    """Copy one video from the archive to storage; returns its storage name."""
+    field = lesson._meta.get_field(f'video_{slot}')
+    with archive.open(info) as member:
+        video = File(member, name=posixpath.basename(info.filename))
+        video.size = info.file_size  # finding it out would mean decompressing the member twice
+        name = field.generate_filename(lesson, video.name)
+        return field.storage.save(name, video, max_length=field.max_length)
+
+
+def import_lessons(lesson_import):
+    """Run ``lesson_import``; raises ``ArchiveError`` for archives that can't be imported."""
+    course_id = lesson_import.course_id
+    saved_videos = []
+    try:
+        with lesson_import.archive.open('rb') as f, zipfile.ZipFile(f) as archive:
+            texts, videos = read_archive(archive)
+            LessonImport.objects.filter(pk=lesson_import.pk).update(total=len(texts) + len(videos))
+
+            def advance(done):
+                if done % PROGRESS_EVERY == 0:
+                    LessonImport.objects.filter(pk=lesson_import.pk).update(processed=done)
+
+            lessons, done = [], 0
+            for stem, info in texts:
+                with archive.open(info) as member:
+                    text = member.read().decode('utf-8', errors='replace')
+                lesson = lesson_from_text(stem, TEXT_FORMATS[posixpath.splitext(info.filename)[1].lower()], text)
+                lesson.course_id = course_id
+                lessons.append((stem, lesson))
+                done += 1
+                advance(done)
+
+            for stem, lesson in lessons:
+                for slot in (1, 2):
+                    info = videos.get((stem, slot))
+                    if info is None:
+                        continue
+                    name = save_video(archive, info, lesson, slot)
+                    saved_videos.append(name)
+                    setattr(lesson, f'video_{slot}', name)
+                    done += 1
+                    advance(done)
+
+        lessons = [lesson for _, lesson in lessons]
+        with transaction.atomic():
+            start = ordering.next_order(course_id)
+            for position, lesson in enumerate(lessons):
+                lesson.order = start + position * ordering.STEP
+            created = Lesson.objects.bulk_create(lessons)
+
+            # What the Lesson receivers in signals.py would have done, once for the batch.
+            progress.lesson_added(course_id, count=len(created))
+            bump_course_version(course_id)
+            touch_course_content(course_id)
+            for lesson in created:
+                if lesson.video_1 or lesson.video_2:
+                    queue_media_processing(lesson)
+
+            LessonImport.objects.filter(pk=lesson_import.pk).update(
+                status=LessonImport.DONE, processed=F('total'), lessons_created=len(created),
+                finished_at=timezone.now(),
+            )
+    except Exception as exc:
+        # Nothing refers to the copied videos unless the lessons were created.
+        for name in saved_videos:
+            Lesson._meta.get_field('video_1').storage.delete(name)
+        if isinstance(exc, zipfile.BadZipFile):
+            raise ArchiveError("The file is not a valid zip archive.") from exc
+        raise
+
+    index.index_documents(Lesson.objects.filter(pk__in=[lesson.pk for lesson in created]).order_by())
+    return len(created)
+
+
+def run_import(import_id):
+    lesson_import = LessonImport.objects.filter(pk=import_id, status=LessonImport.QUEUED).first()
+    if lesson_import is None:
+        return
+    LessonImport.objects.filter(pk=import_id).update(status=LessonImport.RUNNING)
+    try:
+        import_lessons(lesson_import)
+    except ArchiveError as exc:
+        # Bad input fails the same way every time, so this is not retried.
+        LessonImport.objects.filter(pk=import_id).update(
+            status=LessonImport.FAILED, error=str(exc), finished_at=timezone.now(),
+        )
+    except Exception:
+        LessonImport.objects.filter(pk=import_id).update(
+            status=LessonImport.FAILED, error="The import failed unexpectedly.", finished_at=timezone.now(),
+        )
+        raise
+    finally:
+        if lesson_import.archive:
+            lesson_import.archive.delete(save=False)
+            LessonImport.objects.filter(pk=import_id).update(archive='')
+
+
+def queue_import(course, user, archive):
+    """Save the uploaded archive and queue the job that imports it."""
+    with transaction.atomic():
+        lesson_import = LessonImport.objects.create(course=course, created_by=user, archive=archive)
+        # A failed import has been cleaned up and would find no archive to retry with.
+        enqueue('courses.import_lessons', max_attempts=1, import_id=str(lesson_import.pk))
+    return lesson_import
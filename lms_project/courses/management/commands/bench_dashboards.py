@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from lms_project.loadtest import summarize, format_table
+
+MODES = ('wsgi', 'asgi')
+
+VIEWS_BY_ROLE = {
+    'STUDENT': ('student_dashboard', 'my_courses'),
+    'TEACHER': ('teacher_dashboard', 'my_courses'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare dashboard latency under concurrent load between the sync views "
+        "served through WSGI and the async views served through ASGI. Each mode "
+        "runs in its own process so the URLconf matches what that server would use."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=MODES + ('both',), default='both')
+        parser.add_argument('--requests', type=int, default=500, help="Requests per mode.")
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--users', type=int, default=8, help="Students and teachers to log in as (each).")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+        parser.add_argument('--worker', action='store_true', help="Internal: run one mode in this process.")
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.run_worker(options)
+            return
+
+        modes = MODES if options['mode'] == 'both' else (options['mode'],)
+        results = {mode: self.spawn(mode, options) for mode in modes}
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for mode, result in results.items():
+            self.report(mode, result)
+        if len(results) == 2:
+            wsgi, asgi = results['wsgi']['total'], results['asgi']['total']
+            self.stdout.write(
+                f"\nASGI vs WSGI: p50 {asgi['p50_ms'] / wsgi['p50_ms']:.2f}x, "
+                f"p95 {asgi['p95_ms'] / wsgi['p95_ms']:.2f}x, "
+                f"throughput {asgi['throughput'] / wsgi['throughput']:.2f}x"
+            )
+
+    # ---- Parent process ----
+    def spawn(self, mode, options):
+        env = dict(os.environ, LMS_ASYNC_VIEWS='1' if mode == 'asgi' else '0')
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_dashboards', '--worker',
+            '--mode', mode,
+            '--requests', str(options['requests']),
+            '--concurrency', str(options['concurrency']),
+            '--users', str(options['users']),
+        ]
+        self.stderr.write(f"Running {mode} ({options['requests']} requests, concurrency {options['concurrency']})...")
+        proc = subprocess.run(command, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise CommandError(f"{mode} run failed:\n{proc.stderr}")
+        return json.loads(proc.stdout)
+
+    def report(self, mode, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{mode.upper()}"))
+        for line in format_table(list(result['views'].items()) + [('total', result['total'])]):
+            self.stdout.write(line)
+        if result['errors']:
+            self.stdout.write(self.style.WARNING(f"{result['errors']} requests did not return 200"))
+
+    # ---- Worker process ----
+    def run_worker(self, options):
+        if (options['mode'] == 'asgi') != settings.ASYNC_VIEWS:
+            raise CommandError("Set LMS_ASYNC_VIEWS=1 for the asgi mode and leave it unset for wsgi.")
+
+        # The test clients send 'Host: testserver', which only the test runner allows.
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        plan = self.plan(options['users'])
+        jobs = [plan[i % len(plan)] for i in range(options['requests'])]
+        if options['mode'] == 'asgi':
+            timings, elapsed = asyncio.run(self.run_asgi(jobs, options['concurrency']))
+        else:
+            timings, elapsed = self.run_wsgi(jobs, options['concurrency'])
+
+        by_view = {}
+        for name, latency, _ in timings:
+            by_view.setdefault(name, []).append(latency)
+        self.stdout.write(json.dumps({
+            'views': {name: summarize(latencies, elapsed) for name, latencies in sorted(by_view.items())},
+            'total': summarize([latency for _, latency, _ in timings], elapsed),
+            'errors': sum(1 for _, _, status in timings if status != 200),
+        }))
+
+    def plan(self, per_role):
+        """``(user, view name, url)`` for every user and dashboard they can open."""
+        plan = []
+        for role, view_names in VIEWS_BY_ROLE.items():
+            users = list(User.objects.filter(usertable__role=role).order_by('pk')[:per_role])
+            for user in users:
+                plan.extend((user, name, reverse(name)) for name in view_names)
+        if not plan:
+            raise CommandError("No students or teachers to log in as; create some users first.")
+        return plan
+
+    def run_wsgi(self, jobs, concurrency):
+        # A test client keeps per-session state, so each worker thread gets its
+        # own clients and works through its own slice of the jobs.
+        slices = [jobs[i::concurrency] for i in range(concurrency)]
+        workers = []
+        for jobs in slices:
+            clients = {}
+            for user, _, _ in jobs:
+                if user.pk not in clients:
+                    clients[user.pk] = Client()
+                    clients[user.pk].force_login(user)
+            workers.append((clients, jobs))
+
+        def fetch(clients, job):
+            user, name, url = job
+            start = time.perf_counter()
+            response = clients[user.pk].get(url)
+            return name, time.perf_counter() - start, response.status_code
+
+        # One untimed request per client loads templates and URLconfs.
+        for clients, jobs in workers:
+            for job in jobs[:len(clients)]:
+                fetch(clients, job)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(lambda w: [fetch(w[0], job) for job in w[1]], workers))
+        elapsed = time.perf_counter() - start
+        return [timing for chunk in results for timing in chunk], elapsed
+
+    async def run_asgi(self, jobs, concurrency):
+        slices = [jobs[i::concurrency] for i in range(concurrency)]
+        workers = []
+        for jobs in slices:
+            clients = {}
+            for user, _, _ in jobs:
+                if user.pk not in clients:
+                    clients[user.pk] = AsyncClient()
+                    await clients[user.pk].aforce_login(user)
+            workers.append((clients, jobs))
+
+        async def fetch(clients, job):
+            user, name, url = job
+            start = time.perf_counter()
+            response = await clients[user.pk].get(url)
+            return name, time.perf_counter() - start, response.status_code
+
+        for clients, jobs in workers:
+            for job in jobs[:len(clients)]:
+                await fetch(clients, job)
+
+        async def run_worker(clients, jobs):
+            return [await fetch(clients, job) for job in jobs]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_worker(clients, jobs) for clients, jobs in workers))
+        elapsed = time.perf_counter() - start
+        return [timing for chunk in results for timing in chunk], elapsed
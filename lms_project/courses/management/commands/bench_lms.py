@@ -0,0 +1,253 @@
+import http.cookiejar
+import json
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from courses.models import Course, Enrollment, Quiz, Question, Lesson
+from lms_project.loadtest import summarize, format_table
+from lms_project.middleware import QueryStats
+from queries.models import Query
+
+SCENARIOS = ('course_list', 'course_detail', 'student_dashboard', 'attempt_quiz', 'query_list')
+
+
+class InProcessSession:
+    """Requests through the Django test client, counting the queries each one runs."""
+
+    def __init__(self, user):
+        self.client = Client()
+        if user is not None:
+            self.client.force_login(user)
+
+    def request(self, method, path, data=None):
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats))
+            if method == 'POST':
+                response = self.client.post(path, data)
+            else:
+                response = self.client.get(path)
+        return response.status_code, stats.count
+
+
+class ServerSession:
+    """Requests to a running server over HTTP, logged in through the login form."""
+
+    def __init__(self, base_url, user, password):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+        if user is not None:
+            status, _ = self.request('POST', reverse('login'), {'username': user.username, 'password': password})
+            if not any(cookie.name == settings.SESSION_COOKIE_NAME for cookie in self.cookies):
+                raise CommandError(f"Could not log in to {self.base_url} as {user.username} (HTTP {status}).")
+
+    def csrf_token(self, path):
+        token = self.cookie(settings.CSRF_COOKIE_NAME)
+        if token is None:
+            self.request('GET', path)
+            token = self.cookie(settings.CSRF_COOKIE_NAME)
+        return token
+
+    def cookie(self, name):
+        return next((cookie.value for cookie in self.cookies if cookie.name == name), None)
+
+    def request(self, method, path, data=None):
+        url = self.base_url + path
+        body = None
+        headers = {}
+        if method == 'POST':
+            data = {**(data or {}), 'csrfmiddlewaretoken': self.csrf_token(path)}
+            body = urllib.parse.urlencode(data, doseq=True).encode()
+            headers = {'Referer': url, 'Content-Type': 'application/x-www-form-urlencoded'}
+        req = urllib.request.Request(url, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(req) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as exc:
+            return exc.code, None
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the main pages (course_list, course_detail, student_dashboard, "
+        "attempt_quiz POST, query_list) with concurrent requests, in-process through "
+        "the test client or against a running server with --server. Reports "
+        "p50/p95/p99 latency, throughput and, in-process, queries per request. "
+        "Run seed_lms first for realistic volumes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per scenario.")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--users', type=int, default=20, help="Students and teachers to log in as (each).")
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, dest='scenarios',
+                            help="Run only this scenario; may be repeated.")
+        parser.add_argument('--server', help="Base URL of a running server, e.g. http://127.0.0.1:8000.")
+        parser.add_argument('--prefix', default='seed',
+                            help="Log in as the users seed_lms created with this prefix; '' for any user.")
+        parser.add_argument('--password', default='password', help="Password of the users, with --server.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--compare', help="Compare with the results in this JSON file.")
+        parser.add_argument('--seed', type=int, default=None, help="Random seed for picking users and pages.")
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        if options['server'] is None:
+            # The test client sends 'Host: testserver', which only the test runner allows.
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        students, teachers = self.pick_users(options['users'], options['prefix'])
+        course_ids = list(Course.objects.order_by('?').values_list('id', flat=True)[:200])
+        if not students or not teachers or not course_ids:
+            raise CommandError("Needs students, teachers and courses; run seed_lms first.")
+
+        scenarios = {
+            'course_list': lambda: (None, 'GET', reverse('course_list'), None),
+            'course_detail': lambda: (
+                self.rng.choice(students), 'GET', reverse('course_detail', args=[self.rng.choice(course_ids)]), None,
+            ),
+            'student_dashboard': lambda: (self.rng.choice(students), 'GET', reverse('student_dashboard'), None),
+            'attempt_quiz': self.quiz_submission(students),
+            'query_list': lambda: (self.rng.choice(teachers), 'GET', reverse('query_list'), None),
+        }
+
+        results = {}
+        for name in options['scenarios'] or SCENARIOS:
+            if scenarios[name] is None:
+                self.stderr.write(f"Skipping {name}: no student is enrolled in a course with a quiz.")
+                continue
+            self.stderr.write(f"Running {name}...")
+            results[name] = self.run(scenarios[name])
+
+        for line in format_table(results.items()):
+            self.stdout.write(line)
+
+        report = {
+            'started_at': started_at.isoformat(),
+            'target': options['server'] or 'in-process',
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'data': {
+                'users': User.objects.count(),
+                'courses': Course.objects.count(),
+                'lessons': Lesson.objects.count(),
+                'enrollments': Enrollment.objects.count(),
+                'queries': Query.objects.count(),
+            },
+            'scenarios': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+        if options['compare']:
+            self.compare(report, options['compare'])
+
+    def pick_users(self, count, prefix):
+        users = User.objects.filter(username__startswith=f'{prefix}_') if prefix else User.objects.all()
+        students = list(users.filter(usertable__role='STUDENT', enrollments__isnull=False).distinct()[:count])
+        teachers = list(users.filter(usertable__role='TEACHER')[:count])
+        return students, teachers
+
+    def quiz_submission(self, students):
+        """A scenario posting random answers to a quiz each student is enrolled for, or None."""
+        quizzes = {}
+        for student in students:
+            quiz_id = Quiz.objects.filter(course__enrollments__student=student).values_list('id', flat=True).first()
+            if quiz_id is not None:
+                quizzes[student.pk] = (student, quiz_id)
+        if not quizzes:
+            return None
+        questions = {}
+        for quiz_id, question_id in Question.objects.filter(
+            quiz_id__in=[quiz_id for _, quiz_id in quizzes.values()]
+        ).values_list('quiz_id', 'id'):
+            questions.setdefault(quiz_id, []).append(question_id)
+
+        def submission():
+            student, quiz_id = self.rng.choice(list(quizzes.values()))
+            data = {f'q_{question_id}': self.rng.choice('ABCD') for question_id in questions.get(quiz_id, ())}
+            return student, 'POST', reverse('attempt_quiz', args=[quiz_id]), data
+        return submission
+
+    def session(self, user):
+        if self.options['server']:
+            return ServerSession(self.options['server'], user, self.options['password'])
+        return InProcessSession(user)
+
+    def run(self, scenario):
+        requests, concurrency = self.options['requests'], self.options['concurrency']
+        jobs = [scenario() for _ in range(requests)]
+
+        # Each worker thread has its own sessions and works through its own
+        # slice of the jobs; logging in happens before the clock starts.
+        workers = []
+        for worker_jobs in (jobs[i::concurrency] for i in range(concurrency)):
+            sessions = {}
+            for user, _, _, _ in worker_jobs:
+                key = user.pk if user else None
+                if key not in sessions:
+                    sessions[key] = self.session(user)
+            workers.append((sessions, worker_jobs))
+
+        def work(worker):
+            sessions, worker_jobs = worker
+            timings = []
+            for user, method, path, data in worker_jobs:
+                start = time.perf_counter()
+                status, queries = sessions[user.pk if user else None].request(method, path, data)
+                timings.append((time.perf_counter() - start, queries, status))
+            return timings
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            timings = [timing for chunk in pool.map(work, workers) for timing in chunk]
+        elapsed = time.perf_counter() - start
+
+        queries = [q for _, q, _ in timings] if self.options['server'] is None else None
+        summary = summarize([t for t, _, _ in timings], elapsed, queries)
+        summary['errors'] = sum(1 for _, _, status in timings if status >= 400)
+        if summary['errors']:
+            self.stderr.write(self.style.WARNING(f"{summary['errors']} requests failed"))
+        return summary
+
+    def compare(self, report, path):
+        try:
+            with open(path) as f:
+                previous = json.load(f)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read {path}: {exc}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nChange since {previous.get('started_at', path)}"))
+        self.stdout.write(f"{'':<20} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>9} {'queries':>9}")
+        for name, row in report['scenarios'].items():
+            old = previous.get('scenarios', {}).get(name)
+            if not old:
+                continue
+
+            def change(key):
+                if row.get(key) is None or not old.get(key):
+                    return '-'
+                return f"{(row[key] - old[key]) / old[key] * 100:+.0f}%"
+            self.stdout.write(
+                f"{name:<20} {change('p50_ms'):>9} {change('p95_ms'):>9} {change('p99_ms'):>9} "
+                f"{change('throughput'):>9} {change('queries_per_request'):>9}"
+            )
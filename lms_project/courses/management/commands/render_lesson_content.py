@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses import rendering
+from courses.models import Lesson
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the stored HTML of lessons whose content changed since it was last rendered, "
+        "or that predate it (bulk inserts and updates skip Lesson.save)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Re-render every lesson, even unchanged ones.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        lessons = Lesson.objects.only('id', 'content', 'content_format', 'content_hash').order_by('pk')
+
+        batch, checked, rendered = [], 0, 0
+        for lesson in lessons.iterator(chunk_size=options['batch_size']):
+            checked += 1
+            if options['all']:
+                lesson.content_hash = ''
+            if rendering.refresh(lesson):
+                batch.append(lesson)
+            if len(batch) >= options['batch_size']:
+                rendered += Lesson.objects.bulk_update(batch, ['content_html', 'content_hash'])
+                batch = []
+        if batch:
+            rendered += Lesson.objects.bulk_update(batch, ['content_html', 'content_hash'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered} of {checked} lessons in {time.monotonic() - start:.1f}s."
+        ))
@@ -0,0 +1,193 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import UserTable
+from courses import ordering, rendering, stats
+from courses.models import Course, Lesson, Enrollment, Quiz, Question
+from queries.models import Query
+from search import index
+
+WORDS = (
+    "algebra analysis array binary cache calculus chemistry circuit class compiler data database "
+    "derivative design energy equation essay function geometry graph history integral language "
+    "lattice logic matrix memory method model network number optics physics pointer probability "
+    "process proof protocol query recursion sample series signal statistics stream structure "
+    "system theory thread tree variable vector wave"
+).split()
+
+OPTIONS = ('A', 'B', 'C', 'D')
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users, courses, lessons, quizzes, questions, enrollments "
+        "and queries with bulk inserts, for load testing. Every generated user has "
+        "the password given by --password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=20)
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--courses', type=int, default=200)
+        parser.add_argument('--lessons', type=int, default=10, help="Lessons per course.")
+        parser.add_argument('--quizzes', type=int, default=2, help="Quizzes per course.")
+        parser.add_argument('--questions', type=int, default=10, help="Questions per quiz.")
+        parser.add_argument('--enrollments', type=int, default=5, help="Courses per student.")
+        parser.add_argument('--queries', type=int, default=2000)
+        parser.add_argument('--prefix', default='seed', help="Prefix of the generated usernames.")
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=None, help="Random seed, for repeatable data.")
+
+    def handle(self, *args, **options):
+        if options['teachers'] < 1 and options['courses']:
+            raise CommandError("Courses need at least one teacher.")
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Users named '{prefix}_*' already exist; choose another --prefix.")
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.start = time.monotonic()
+
+        # Hashing is deliberately slow, so every generated user shares one hash.
+        password = make_password(options['password'])
+        teacher_ids = self.create_users(f'{prefix}_teacher', options['teachers'], 'TEACHER', password)
+        student_ids = self.create_users(f'{prefix}_student', options['students'], 'STUDENT', password)
+
+        course_ids = self.create_courses(teacher_ids, options['courses'], options['lessons'])
+        self.create_lessons(course_ids, options['lessons'])
+        self.create_quizzes(course_ids, options['quizzes'], options['questions'])
+        enrolled = self.create_enrollments(student_ids, course_ids, options['enrollments'])
+        self.create_queries(enrolled, options['queries'])
+        stats.rebuild(course_ids)
+        self.done("course stats", len(course_ids))
+
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.monotonic() - self.start:.1f}s."))
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def done(self, label, count):
+        self.stdout.write(f"{count} {label} ({time.monotonic() - self.start:.1f}s)")
+
+    def create_users(self, prefix, count, role, password):
+        users = [
+            User(username=f'{prefix}{n}', email=f'{prefix}{n}@example.com', password=password)
+            for n in range(1, count + 1)
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=self.batch_size)
+            ids = list(User.objects.filter(username__startswith=prefix).order_by('id').values_list('id', flat=True))
+            UserTable.objects.bulk_create(
+                [UserTable(user_id=user_id, role=role) for user_id in ids], batch_size=self.batch_size,
+            )
+        self.done(f"{role.lower()}s", len(ids))
+        return ids
+
+    def create_courses(self, teacher_ids, count, lessons_per_course):
+        courses = [
+            Course(
+                title=f"{self.text(3).title()} {n}",
+                description=self.text(40),
+                teacher_id=self.rng.choice(teacher_ids),
+                lesson_count=lessons_per_course,  # the lessons are bulk-created below
+            )
+            for n in range(1, count + 1)
+        ]
+        with transaction.atomic():
+            Course.objects.bulk_create(courses, batch_size=self.batch_size)
+        ids = list(Course.objects.filter(teacher_id__in=teacher_ids).order_by('id').values_list('id', flat=True))
+        self.done("courses", len(ids))
+        return ids
+
+    def create_lessons(self, course_ids, per_course):
+        lessons = [
+            Lesson(course_id=course_id, title=f"Lesson {n}: {self.text(3)}", content=self.text(300),
+                   order=n * ordering.STEP)
+            for course_id in course_ids for n in range(1, per_course + 1)
+        ]
+        for lesson in lessons:
+            rendering.refresh(lesson)  # bulk_create skips Lesson.save
+        with transaction.atomic():
+            Lesson.objects.bulk_create(lessons, batch_size=self.batch_size)
+        self.done("lessons", len(lessons))
+
+        # bulk_create sends no signals, so index the new rows directly.
+        for start in range(0, len(course_ids), self.batch_size):
+            ids = course_ids[start:start + self.batch_size]
+            index.index_documents(Course.objects.filter(pk__in=ids).only('id', 'title', 'description', 'teacher_id'))
+            index.index_documents(
+                Lesson.objects.filter(course_id__in=ids).only('id', 'title', 'content', 'course_id').order_by()
+            )
+
+    def create_quizzes(self, course_ids, per_course, questions_per_quiz):
+        teachers = dict(Course.objects.filter(pk__in=course_ids).values_list('id', 'teacher_id'))
+        quizzes = [
+            Quiz(course_id=course_id, title=f"Quiz {n}: {self.text(2)}", created_by_id=teachers[course_id])
+            for course_id in course_ids for n in range(1, per_course + 1)
+        ]
+        with transaction.atomic():
+            Quiz.objects.bulk_create(quizzes, batch_size=self.batch_size)
+            quiz_ids = Quiz.objects.filter(course_id__in=course_ids).values_list('id', flat=True)
+            questions = [
+                Question(
+                    quiz_id=quiz_id,
+                    text=self.text(12) + '?',
+                    option_a=self.text(3),
+                    option_b=self.text(3),
+                    option_c=self.text(3),
+                    option_d=self.text(3),
+                    correct_option=self.rng.choice(OPTIONS),
+                )
+                for quiz_id in quiz_ids for _ in range(questions_per_quiz)
+            ]
+            Question.objects.bulk_create(questions, batch_size=self.batch_size)
+        self.done("quizzes", len(quizzes))
+        self.done("questions", len(questions))
+
+    def create_enrollments(self, student_ids, course_ids, per_student):
+        """Returns ``{student_id: [course_id, ...]}``."""
+        per_student = min(per_student, len(course_ids))
+        enrolled = {student_id: self.rng.sample(course_ids, per_student) for student_id in student_ids}
+        enrollments = [
+            Enrollment(student_id=student_id, course_id=course_id)
+            for student_id, courses in enrolled.items() for course_id in courses
+        ]
+        with transaction.atomic():
+            Enrollment.objects.bulk_create(enrollments, batch_size=self.batch_size)
+        self.done("enrollments", len(enrollments))
+        return enrolled
+
+    def create_queries(self, enrolled, count):
+        pairs = [(student_id, course_id) for student_id, courses in enrolled.items() for course_id in courses]
+        if not pairs or not count:
+            return
+        teachers = dict(Course.objects.filter(pk__in={c for _, c in pairs}).values_list('id', 'teacher_id'))
+        statuses = [code for code, _ in Query.STATUS_CHOICES]
+
+        queries = []
+        for _ in range(count):
+            student_id, course_id = self.rng.choice(pairs)
+            status = self.rng.choice(statuses)
+            queries.append(Query(
+                title=self.text(6).capitalize() + '?',
+                description=self.text(60),
+                course_id=course_id,
+                created_by_id=student_id,
+                assigned_to_id=None if status == 'Open' else teachers[course_id],
+                status=status,
+            ))
+        with transaction.atomic():
+            created = Query.objects.bulk_create(queries, batch_size=self.batch_size)
+        self.done("queries", len(created))
+
+        if created and created[0].pk is not None:
+            index.index_documents(created)
+        else:
+            self.stdout.write("Run rebuild_search_index to index the new queries.")
@@ -0,0 +1,125 @@
+"""
+Post-processing of uploaded lesson videos, run by the job worker.
+
+For each video the lesson has, ``ffprobe`` reads the duration and
+resolution and ``ffmpeg`` grabs a poster frame. MP4 and MOV files are
+also remuxed with ``-movflags +faststart``, so the index sits at the
+start of the file and playback can begin before the download finishes.
+Without ffmpeg the videos are still marked ready, with only their size
+recorded.
+
+The result is stored in ``Lesson.media_info`` and its progress in
+``Lesson.media_status``.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from jobs.queue import enqueue
+from .models import Lesson
+
+POSTER_DIR = 'lesson_posters'
+FASTSTART_EXTENSIONS = ('.mp4', '.m4v', '.mov')
+FFMPEG_TIMEOUT = 60 * 60
+
+
+def queue_media_processing(lesson):
+    """Mark the lesson's videos as pending and queue the job that processes them."""
+    with transaction.atomic():
+        Lesson.objects.filter(pk=lesson.pk).update(media_status=Lesson.MEDIA_PENDING)
+        enqueue('courses.process_lesson_media', lesson_id=lesson.pk)
+    lesson.media_status = Lesson.MEDIA_PENDING
+
+
+def _run(*args):
+    return subprocess.run(args, check=True, capture_output=True, text=True, timeout=FFMPEG_TIMEOUT).stdout
+
+
+def probe(path):
+    """Duration (seconds), resolution and codec of the video at ``path``, or {} without ffprobe."""
+    if not shutil.which('ffprobe'):
+        return {}
+    data = json.loads(_run(
+        'ffprobe', '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', path,
+    ))
+    info = {'duration': float(data.get('format', {}).get('duration') or 0)}
+    video = next((s for s in data.get('streams', ()) if s.get('codec_type') == 'video'), None)
+    if video:
+        info.update(width=video.get('width'), height=video.get('height'), codec=video.get('codec_name'))
+    return info
+
+
+def make_poster(path, name, duration):
+    """Save a JPEG frame from early in the video under MEDIA_ROOT; returns its media name."""
+    poster_name = f'{POSTER_DIR}/{name}.jpg'
+    poster_path = os.path.join(settings.MEDIA_ROOT, poster_name)
+    os.makedirs(os.path.dirname(poster_path), exist_ok=True)
+    _run(
+        'ffmpeg', '-v', 'error', '-y', '-ss', str(min(1.0, duration / 2)), '-i', path,
+        '-frames:v', '1', '-vf', 'scale=640:-2', poster_path,
+    )
+    return poster_name
+
+
+def make_faststart(path):
+    """Rewrite the MP4/MOV at ``path`` with its index first; the file keeps its name."""
+    root, ext = os.path.splitext(path)
+    temp_path = f'{root}.faststart{ext}'
+    try:
+        _run('ffmpeg', '-v', 'error', '-y', '-i', path, '-map', '0', '-c', 'copy', '-movflags', '+faststart', temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def process_video(fieldfile, poster_name):
+    path = fieldfile.path
+    info = probe(path)
+    if shutil.which('ffmpeg'):
+        if info.get('width'):
+            info['poster'] = make_poster(path, poster_name, info.get('duration', 0))
+        if path.lower().endswith(FASTSTART_EXTENSIONS):
+            make_faststart(path)
+            info['faststart'] = True
+    else:
+        info['note'] = 'ffmpeg is not installed; the video is served as uploaded.'
+    info['size'] = os.path.getsize(path)
+    return info
+
+
+def process_lesson(lesson_id):
+    lesson = Lesson.objects.filter(pk=lesson_id).first()
+    if lesson is None:
+        return
+    Lesson.objects.filter(pk=lesson_id).update(media_status=Lesson.MEDIA_PROCESSING)
+
+    info = {}
+    status = Lesson.MEDIA_READY
+    for slot in (1, 2):
+        video = getattr(lesson, f'video_{slot}')
+        if not video:
+            continue
+        try:
+            info[f'video_{slot}'] = process_video(video, f'{lesson.pk}_{slot}')
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ValueError, OSError) as exc:
+            # Bad input (or a missing file or ffmpeg binary) fails the same way
+            # every time, so this is not retried.
+            stderr = getattr(exc, 'stderr', None) or str(exc)
+            info[f'video_{slot}'] = {'error': stderr.strip()[-500:]}
+            status = Lesson.MEDIA_FAILED
+
+    # Only record the result if the videos were not replaced in the meantime;
+    # the replacement has queued its own job.
+    unchanged = Q()
+    for slot in (1, 2):
+        name = getattr(lesson, f'video_{slot}').name
+        field = f'video_{slot}'
+        unchanged &= Q(**{field: name}) if name else Q(**{f'{field}__isnull': True}) | Q(**{field: ''})
+    Lesson.objects.filter(unchanged, pk=lesson_id).update(media_status=status, media_info=info)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:18
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    for course in Course.objects.annotate(n=Count('lessons')).only('id'):
+        Course.objects.filter(pk=course.pk).update(lesson_count=course.n)
+    for enrollment in Enrollment.objects.annotate(n=Count('completed_lessons')).select_related('course'):
+        Enrollment.objects.filter(pk=enrollment.pk).update(
+            completed_count=enrollment.n,
+            completed=enrollment.course.lesson_count > 0 and enrollment.n >= enrollment.course.lesson_count,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_videoupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
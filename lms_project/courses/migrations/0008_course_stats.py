@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def fill_stats(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CourseStats = apps.get_model('courses', 'CourseStats')
+    QuizAttempt = apps.get_model('courses', 'QuizAttempt')
+    Query = apps.get_model('queries', 'Query')
+
+    attempts = {
+        row['quiz__course_id']: row
+        for row in QuizAttempt.objects.values('quiz__course_id').annotate(n=Count('id'), score=Sum('score'), total=Sum('total'))
+    }
+    open_queries = dict(Query.objects.filter(status='Open').values('course_id').annotate(n=Count('id')).values_list('course_id', 'n'))
+    stats = []
+    for course in Course.objects.annotate(
+        n_enrolled=Count('enrollments'), n_completed=Count('enrollments', filter=Q(enrollments__completed=True)),
+    ):
+        row = attempts.get(course.pk, {})
+        stats.append(CourseStats(
+            course_id=course.pk,
+            enrollment_count=course.n_enrolled,
+            completed_count=course.n_completed,
+            attempt_count=row.get('n', 0),
+            score_sum=row.get('score') or 0,
+            max_score_sum=row.get('total') or 0,
+            open_query_count=open_queries.get(course.pk, 0),
+        ))
+    CourseStats.objects.bulk_create(stats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_lesson_media_status'),
+        ('queries', '0006_remove_query_response'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.course')),
+                ('enrollment_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('attempt_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveIntegerField(default=0)),
+                ('max_score_sum', models.PositiveIntegerField(default=0)),
+                ('open_query_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
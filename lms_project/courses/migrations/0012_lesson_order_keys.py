@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+STEP = 1024  # courses.ordering.STEP when this was written
+
+
+def spread_order_keys(apps, schema_editor):
+    Lesson = apps.get_model('courses', 'Lesson')
+    course_ids = Lesson.objects.values_list('course_id', flat=True).distinct().order_by()
+    for course_id in list(course_ids):
+        lessons = list(Lesson.objects.filter(course_id=course_id).order_by('order', 'pk').only('id', 'order'))
+        for position, lesson in enumerate(lessons, start=1):
+            lesson.order = position * STEP
+        Lesson.objects.bulk_update(lessons, ['order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_lessonimport'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['course', 'order'], name='lesson_course_order_idx'),
+        ),
+        migrations.RunPython(spread_order_keys, migrations.RunPython.noop),
+    ]
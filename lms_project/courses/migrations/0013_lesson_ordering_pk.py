@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_lesson_order_keys'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='lesson',
+            options={'ordering': ['order', 'pk']},
+        ),
+    ]
@@ -1,5 +1,12 @@
+import os
+import uuid
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import rendering
 
 
 class Course(models.Model):
@@ -7,23 +14,106 @@ class Course(models.Model):
     description = models.TextField()
     teacher = models.ForeignKey(User, on_delete=models.CASCADE, related_name="courses_taught")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # The newest change to the course or its lessons, quizzes and questions (see save() and signals).
+    content_updated_at = models.DateTimeField(default=timezone.now, editable=False)
+    lesson_count = models.PositiveIntegerField(default=0, editable=False)  # kept up to date by signals
+
+    class Meta:
+        indexes = [
+            # Backs the keyset-paginated catalog (newest first).
+            models.Index(fields=['-created_at', '-id'], name='course_created_id_idx'),
+            # MAX(updated_at) for the catalog's Last-Modified.
+            models.Index(fields=['updated_at'], name='course_updated_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Anything saved may be on the course page, so it moves its Last-Modified too.
+        self.content_updated_at = timezone.now()
+        if kwargs.get('update_fields') is not None:
+            # auto_now only applies to the fields being saved.
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at', 'content_updated_at'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
 
 
+class CourseStats(models.Model):
+    """Summary counters for one course, kept up to date by ``courses.stats``."""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    enrollment_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)  # enrollments that finished the course
+    attempt_count = models.PositiveIntegerField(default=0)
+    score_sum = models.PositiveIntegerField(default=0)  # questions answered correctly, over all attempts
+    max_score_sum = models.PositiveIntegerField(default=0)  # questions attempted
+    open_query_count = models.PositiveIntegerField(default=0)
+
+    @property
+    def completion_rate(self):
+        return round(self.completed_count / self.enrollment_count * 100) if self.enrollment_count else 0
+
+    @property
+    def average_score(self):
+        """Average quiz score in percent, or None before the first attempt."""
+        return round(self.score_sum / self.max_score_sum * 100) if self.max_score_sum else None
+
+    def __str__(self):
+        return f"Stats for course {self.course_id}"
+
+
 class Lesson(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="lessons")
+    FORMAT_TEXT = 'text'
+    FORMAT_MARKDOWN = 'markdown'
+    CONTENT_FORMAT_CHOICES = [
+        (FORMAT_TEXT, 'Plain text'),
+        (FORMAT_MARKDOWN, 'Markdown'),
+    ]
+
     title = models.CharField(max_length=200)
     content = models.TextField()
+    content_format = models.CharField(max_length=10, choices=CONTENT_FORMAT_CHOICES, default=FORMAT_TEXT)
+    # Rendered from content when the lesson is saved (see courses.rendering).
+    content_html = models.TextField(blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # Sparse: lessons are numbered ordering.STEP apart, see courses.ordering.
     order = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    MEDIA_PENDING = 'pending'
+    MEDIA_PROCESSING = 'processing'
+    MEDIA_READY = 'ready'
+    MEDIA_FAILED = 'failed'
+    MEDIA_STATUS_CHOICES = [
+        (MEDIA_PENDING, 'Pending'),
+        (MEDIA_PROCESSING, 'Processing'),
+        (MEDIA_READY, 'Ready'),
+        (MEDIA_FAILED, 'Failed'),
+    ]
 
     # ✅ New: optional video uploads (up to 2 videos)
     video_1 = models.FileField(upload_to='lesson_videos/', blank=True, null=True)
     video_2 = models.FileField(upload_to='lesson_videos/', blank=True, null=True)
+    # Set by the background job in courses.media; empty until a video is uploaded.
+    media_status = models.CharField(max_length=10, choices=MEDIA_STATUS_CHOICES, blank=True, editable=False)
+    media_info = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
-        ordering = ["order"]
+        ordering = ["order", "pk"]
+        indexes = [
+            # Lists a course's lessons in order straight from the index, without a sort.
+            models.Index(fields=['course', 'order'], name='lesson_course_order_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # auto_now only applies to the fields being saved.
+            update_fields = kwargs['update_fields'] = {*update_fields, 'updated_at'}
+        if 'content' not in self.get_deferred_fields() and rendering.refresh(self) and update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'content_html', 'content_hash'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
@@ -34,11 +124,18 @@ class Enrollment(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="enrollments")
     enrolled_on = models.DateTimeField(auto_now_add=True)
     completed_lessons = models.ManyToManyField(Lesson, blank=True)
+    completed_count = models.PositiveIntegerField(default=0, editable=False)  # len(completed_lessons)
     completed = models.BooleanField(default=False)
 
     class Meta:
         unique_together = ('student', 'course')
 
+    @property
+    def progress_percent(self):
+        """Needs ``course`` loaded; use ``progress.with_progress()`` for lists."""
+        lesson_count = self.course.lesson_count
+        return min(100, round(self.completed_count / lesson_count * 100)) if lesson_count else 0
+
     def __str__(self):
         return f"{self.student.username} → {self.course.title}"
 
@@ -66,4 +163,98 @@ class Question(models.Model):
     correct_option = models.CharField(max_length=1, choices=OPTION_CHOICES)
 
     def __str__(self):
-        return f"Q: {self.text[:60]}..."
\ No newline at end of file
+        return f"Q: {self.text[:60]}..."
+
+
+class QuizAttempt(models.Model):
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="attempts")
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="quiz_attempts")
+    score = models.PositiveIntegerField()
+    total = models.PositiveIntegerField()
+    submitted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'quiz'], name='attempt_student_quiz_idx'),
+        ]
+
+    @property
+    def percent(self):
+        return (self.score / self.total * 100) if self.total else 0
+
+    def __str__(self):
+        return f"{self.student.username} → {self.quiz.title}: {self.score}/{self.total}"
+
+
+class AttemptAnswer(models.Model):
+    attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name="answers")
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="attempt_answers")
+    selected_option = models.CharField(max_length=1, blank=True)
+    is_correct = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.attempt_id} / Q{self.question_id}: {self.selected_option or '-'}"
+
+
+class VideoUpload(models.Model):
+    """A resumable, chunked upload of one of a lesson's videos."""
+    SLOT_CHOICES = [(1, 'Video 1'), (2, 'Video 2')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name="video_uploads")
+    slot = models.PositiveSmallIntegerField(choices=SLOT_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="video_uploads")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def temp_path(self):
+        return os.path.join(settings.MEDIA_ROOT, 'upload_tmp', f'{self.id}.part')
+
+    @property
+    def received(self):
+        try:
+            return os.path.getsize(self.temp_path)
+        except FileNotFoundError:
+            return 0
+
+    def __str__(self):
+        return f"{self.filename} → {self.lesson} (video {self.slot})"
+
+
+class LessonImport(models.Model):
+    """A zip of lesson files being turned into lessons by a background job (see ``lesson_import``)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="lesson_imports")
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="lesson_imports")
+    archive = models.FileField(upload_to='lesson_imports/', blank=True)  # deleted once imported
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    total = models.PositiveIntegerField(default=0)  # files to import, once the archive has been read
+    processed = models.PositiveIntegerField(default=0)
+    lessons_created = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def percent(self):
+        return round(self.processed / self.total * 100) if self.total else 0
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    def __str__(self):
+        return f"Import into {self.course_id} ({self.status})"
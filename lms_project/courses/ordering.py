@@ -0,0 +1,104 @@
+"""
+Lesson positions as sparse ordering keys.
+
+Lessons are numbered ``STEP`` apart, so a lesson moved between two others
+takes the midpoint of their keys and only its own row changes, however
+long the course is. Each move into the same gap halves it; once a move
+leaves a gap narrower than ``MIN_GAP``, a background job renumbers the
+course. A move into a gap that has already closed (two lessons with
+adjacent or equal keys) renumbers the course on the spot.
+
+Lessons are listed by ``(order, id)``, so equal keys still have a stable
+order.
+"""
+
+from django.db import transaction
+from django.db.models import Max, Q
+
+from jobs.models import Job
+from jobs.queue import enqueue
+from .models import Course, Lesson
+from .page_cache import bump_course_version, touch_course_content
+
+STEP = 1024
+MIN_GAP = 8
+REBALANCE_TASK = 'courses.rebalance_lessons'
+
+
+def next_order(course_id):
+    """The key that puts a new lesson after the course's last one."""
+    last = Lesson.objects.filter(course_id=course_id).aggregate(n=Max('order'))['n']
+    return (last or 0) + STEP
+
+
+def _lock_course(course_id):
+    # Moves within one course run one at a time, so two can't take the same midpoint.
+    Course.objects.select_for_update().filter(pk=course_id).values_list('pk', flat=True).first()
+
+
+def _renumber(lessons):
+    """Give ``lessons`` keys ``STEP`` apart, in list order, saving only those that change."""
+    changed = []
+    for position, lesson in enumerate(lessons, start=1):
+        if lesson.order != position * STEP:
+            lesson.order = position * STEP
+            changed.append(lesson)
+    Lesson.objects.bulk_update(changed, ['order'], batch_size=500)
+    return len(changed)
+
+
+def move_lesson(lesson, after=None):
+    """
+    Move ``lesson`` right after ``after``, another lesson of the same course,
+    or to the top when ``after`` is None. Returns the lesson's new key.
+    """
+    course_id = lesson.course_id
+    with transaction.atomic():
+        _lock_course(course_id)
+        others = Lesson.objects.filter(course_id=course_id).exclude(pk=lesson.pk).order_by('order', 'pk')
+        if after is None:
+            low, following = 0, others
+        else:
+            low = others.values_list('order', flat=True).get(pk=after.pk)
+            following = others.filter(Q(order__gt=low) | Q(order=low, pk__gt=after.pk))
+        high = following.values_list('order', flat=True).first()
+
+        if high is None:
+            key = low + STEP
+        elif high - low >= 2:
+            key = (low + high) // 2
+            if min(key - low, high - key) < MIN_GAP:
+                queue_rebalance(course_id)
+        else:
+            key = None
+        if key is not None:
+            Lesson.objects.filter(pk=lesson.pk).update(order=key)
+        else:
+            # No room between the neighbours: renumber the whole course now.
+            ordered = list(others.only('id', 'order'))
+            position = 0 if after is None else [o.pk for o in ordered].index(after.pk) + 1
+            moved = Lesson.objects.only('id', 'order').get(pk=lesson.pk)
+            ordered.insert(position, moved)
+            _renumber(ordered)
+            key = moved.order
+
+        # update() sends no signals; the lesson list on the course page has changed.
+        bump_course_version(course_id)
+        touch_course_content(course_id)
+    lesson.order = key
+    return key
+
+
+def queue_rebalance(course_id):
+    """Queue a renumbering of the course, unless one is already waiting."""
+    waiting = Job.objects.filter(name=REBALANCE_TASK, status=Job.QUEUED, payload__course_id=course_id)
+    if not waiting.exists():
+        enqueue(REBALANCE_TASK, course_id=course_id)
+
+
+def rebalance(course_id):
+    """Renumber the course's lessons ``STEP`` apart, keeping their order; returns how many changed."""
+    with transaction.atomic():
+        _lock_course(course_id)
+        lessons = list(Lesson.objects.filter(course_id=course_id).order_by('order', 'pk').only('id', 'order'))
+        return _renumber(lessons)
@@ -0,0 +1,81 @@
+"""
+Versioned cache for the shared part of the course page.
+
+Every course has a version number in the cache. Rendered fragments are
+stored under a key that includes it, so changing anything shown on the
+page (see the receivers in ``signals.py``) only has to replace the
+version; stale fragments are never read again and expire on their own.
+``Course.content_updated_at`` dates the page for conditional GETs and is
+moved along by ``touch_course_content``.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.http import Http404
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from lms_project.db_router import read_from_primary
+from .models import Course
+
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(course_id):
+    return f"course:{course_id}:version"
+
+
+def get_course_version(course_id):
+    version = cache.get(_version_key(course_id))
+    if version is None:
+        version = time.time_ns()
+        cache.add(_version_key(course_id), version, None)
+        version = cache.get(_version_key(course_id), version)
+    return version
+
+
+def bump_course_version(course_id):
+    # A fresh timestamp rather than incr(), so an evicted version can
+    # never come back and match an old fragment.
+    cache.set(_version_key(course_id), time.time_ns(), None)
+
+
+def touch_course_content(course_id):
+    """Roll a change to a lesson, quiz or question up to ``Course.content_updated_at``."""
+    Course.objects.filter(pk=course_id).update(content_updated_at=timezone.now())
+
+
+def get_course_content(course_id):
+    """
+    Return the rendered ``title``, ``header`` and ``contents`` (lessons and
+    quizzes) of the course page, rendering and caching them on a miss.
+    Raises Http404.
+    """
+    key = f"course:{course_id}:detail:{get_course_version(course_id)}"
+    content = cache.get(key)
+    if content is None:
+        # A replica may not have the change that bumped the version yet;
+        # rendering from it would cache the old page under the new version.
+        with read_from_primary():
+            try:
+                course = Course.objects.select_related('teacher').get(id=course_id)
+            except Course.DoesNotExist:
+                raise Http404("No Course matches the given query.")
+            context = {
+                'course': course,
+                'lessons': course.lessons.all().order_by('order', 'pk'),
+                'quizzes': course.quizzes.all(),
+            }
+            content = {
+                'title': course.title,
+                'header': str(render_to_string('courses/_course_header.html', context)),
+                'contents': str(render_to_string('courses/_course_contents.html', context)),
+            }
+        cache.set(key, content, FRAGMENT_TIMEOUT)
+    return {
+        'title': content['title'],
+        'header': mark_safe(content['header']),
+        'contents': mark_safe(content['contents']),
+    }
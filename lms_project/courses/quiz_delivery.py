@@ -0,0 +1,81 @@
+"""
+The questions of a quiz as served to the students taking it.
+
+Each quiz is serialised once (without the correct options) and cached
+until the quiz or one of its questions changes (see ``signals.py``),
+together with an ETag derived from its content. Every student sees the
+questions and their options in their own order, shuffled with a seed
+derived from the quiz and the student, so the order is stable across
+reloads without being stored anywhere. The options keep their letters,
+so grading is unaffected.
+"""
+
+import hashlib
+import json
+import random
+
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+from lms_project.db_router import read_from_primary
+
+
+def payload_cache_key(quiz_id):
+    return f"quiz:{quiz_id}:payload"
+
+
+def build_payload(quiz):
+    questions = []
+    for question in quiz.questions.order_by('id'):
+        options = [
+            [letter, text] for letter, text in (
+                ('A', question.option_a), ('B', question.option_b),
+                ('C', question.option_c), ('D', question.option_d),
+            ) if text
+        ]
+        questions.append({'id': question.id, 'text': question.text, 'options': options})
+    return {
+        'id': quiz.id,
+        'title': quiz.title,
+        'course_id': quiz.course_id,
+        'time_limit_minutes': quiz.time_limit_minutes,
+        'questions': questions,
+    }
+
+
+def get_quiz_payload(quiz):
+    """Return ``(payload, etag)`` for the quiz, in question order."""
+    cached = cache.get(payload_cache_key(quiz.id))
+    if cached is None:
+        # Like the course page cache: never cache a replica's stale copy.
+        with read_from_primary():
+            payload = build_payload(quiz)
+        etag = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:32]
+        cached = (payload, etag)
+        cache.set(payload_cache_key(quiz.id), cached, None)
+    return cached
+
+
+def invalidate_quiz_payload(quiz_id):
+    cache.delete(payload_cache_key(quiz_id))
+
+
+def shuffle_seed(quiz_id, student_id):
+    return salted_hmac('courses.quiz_delivery', f"{quiz_id}:{student_id}").hexdigest()
+
+
+def shuffled_for(payload, student_id):
+    """A copy of ``payload`` with the questions and options in this student's order."""
+    rng = random.Random(shuffle_seed(payload['id'], student_id))
+    questions = [dict(question, options=list(question['options'])) for question in payload['questions']]
+    rng.shuffle(questions)
+    for question in questions:
+        rng.shuffle(question['options'])
+    return dict(payload, questions=questions)
+
+
+def student_quiz(quiz, student_id):
+    """Return ``(payload, etag)`` as delivered to one student."""
+    payload, etag = get_quiz_payload(quiz)
+    # The shuffle is a function of the content and the student, and so is the ETag.
+    return shuffled_for(payload, student_id), f'"{etag}-{student_id}"'
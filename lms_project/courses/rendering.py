@@ -0,0 +1,147 @@
+"""
+Lesson content compiled to HTML once, when the lesson is saved, instead of
+on every view.
+
+Plain text gets the same markup as the ``linebreaks`` filter. Markdown is
+converted with the ``markdown`` package when it is installed (otherwise it
+is shown as plain text) and the result passed through an allowlist
+sanitizer, since authors can write raw HTML in Markdown.
+
+``Lesson.content_hash`` records what the stored HTML was rendered from,
+including ``RENDERER_VERSION``; bump that when the output changes and run
+``render_lesson_content`` to re-render existing lessons.
+"""
+
+import hashlib
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.utils.html import linebreaks
+
+try:
+    import markdown
+except ImportError:  # optional: Markdown lessons are shown as plain text without it
+    markdown = None
+
+RENDERER_VERSION = 1
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists']
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt', 'em', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'ins', 'kbd', 'li', 'ol', 'p', 'pre', 'span', 'strong',
+    'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul',
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'td': {'colspan', 'rowspan', 'align'},
+    'th': {'colspan', 'rowspan', 'align'},
+    'code': {'class'},  # language-* from fenced code blocks
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_SCHEMES = {'', 'http', 'https', 'mailto'}
+# Dropped together with everything inside them.
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'textarea', 'select'}
+
+
+class Sanitizer(HTMLParser):
+    """Re-serializes HTML keeping only allowlisted tags and attributes; everything else is escaped."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping += 1
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+        self.out.append(f'<{tag}{self.format_attrs(tag, attrs)}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.dropping and tag in ALLOWED_TAGS:
+            self.out.append(f'<{tag}{self.format_attrs(tag, attrs)}>')
+            if tag not in VOID_TAGS:
+                self.out.append(f'</{tag}>')
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+        # Close anything left open inside it, so the output stays well nested.
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.out.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.out.append(escape(data, quote=False))
+
+    def format_attrs(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES.get(tag, ())
+        parts = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not self.safe_url(value):
+                continue
+            if name == 'class' and not value.startswith('language-'):
+                continue
+            parts.append(f' {name}="{escape(value)}"')
+        if tag == 'a' and any(name == 'href' for name, _ in attrs):
+            parts.append(' rel="nofollow noopener"')
+        return ''.join(parts)
+
+    @staticmethod
+    def safe_url(url):
+        # Browsers ignore control characters and whitespace inside the scheme.
+        cleaned = ''.join(ch for ch in url if ch > ' ').lower()
+        try:
+            return urlsplit(cleaned).scheme in ALLOWED_SCHEMES
+        except ValueError:
+            return False
+
+    def result(self):
+        self.close()
+        return ''.join(self.out) + ''.join(f'</{tag}>' for tag in reversed(self.open_tags))
+
+
+def sanitize(html):
+    sanitizer = Sanitizer()
+    sanitizer.feed(html)
+    return sanitizer.result()
+
+
+def render(text, content_format):
+    """The HTML for lesson ``text`` written in ``content_format`` ('text' or 'markdown')."""
+    if content_format == 'markdown' and markdown is not None:
+        return sanitize(markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS))
+    return linebreaks(text, autoescape=True)
+
+
+def content_hash(text, content_format):
+    # Includes whether Markdown is available, so installing it later makes
+    # render_lesson_content pick up the lessons that fell back to plain text.
+    renderer = f'{RENDERER_VERSION}:{content_format}:{markdown is not None}'
+    return hashlib.sha256(f'{renderer}\n{text}'.encode()).hexdigest()
+
+
+def refresh(lesson):
+    """Re-render ``lesson.content_html`` if its content changed; returns whether it did."""
+    digest = content_hash(lesson.content, lesson.content_format)
+    if digest == lesson.content_hash:
+        return False
+    lesson.content_html = render(lesson.content, lesson.content_format)
+    lesson.content_hash = digest
+    return True
@@ -0,0 +1,100 @@
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from . import progress, stats
+from .grading import invalidate_answer_key
+from .models import Course, CourseStats, Lesson, Enrollment, Quiz, Question, QuizAttempt
+from .page_cache import bump_course_version, touch_course_content
+from .quiz_delivery import invalidate_quiz_payload
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    invalidate_answer_key(instance.quiz_id)
+    invalidate_quiz_payload(instance.quiz_id)
+    course_id = Quiz.objects.filter(pk=instance.quiz_id).values_list('course_id', flat=True).first()
+    if course_id:
+        bump_course_version(course_id)
+        touch_course_content(course_id)
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    bump_course_version(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+@receiver([post_save, post_delete], sender=Quiz)
+def course_content_changed(sender, instance, **kwargs):
+    bump_course_version(instance.course_id)
+    touch_course_content(instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    invalidate_quiz_payload(instance.pk)
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, created, **kwargs):
+    if created:
+        progress.lesson_added(instance.course_id)
+
+
+@receiver(pre_delete, sender=Lesson)
+def lesson_deleting(sender, instance, **kwargs):
+    progress.lesson_removing(instance)
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, origin=None, **kwargs):
+    if stats.deleting_course(origin):
+        return
+    progress.lesson_removed(instance.course_id)
+
+
+@receiver(post_save, sender=Course)
+def course_created(sender, instance, created, **kwargs):
+    if created:
+        CourseStats.objects.get_or_create(course=instance)
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust(instance.course_id, enrollment_count=1, completed_count=int(instance.completed))
+
+
+@receiver(pre_delete, sender=Enrollment)
+def enrollment_deleting(sender, instance, origin=None, **kwargs):
+    if stats.deleting_course(origin):
+        return
+    # progress.py completes enrollments with update(), so the instance may be stale.
+    instance.completed = Enrollment.objects.filter(pk=instance.pk).values_list('completed', flat=True).first() or False
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted(sender, instance, origin=None, **kwargs):
+    if stats.deleting_course(origin):
+        return
+    stats.adjust(
+        instance.course_id, rebuild_missing=False, enrollment_count=-1, completed_count=-int(instance.completed),
+    )
+
+
+@receiver(post_save, sender=QuizAttempt)
+def attempt_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust(instance.quiz.course_id, attempt_count=1, score_sum=instance.score, max_score_sum=instance.total)
+
+
+@receiver(post_delete, sender=QuizAttempt)
+def attempt_deleted(sender, instance, origin=None, **kwargs):
+    if stats.deleting_course(origin):
+        return
+    course_id = Quiz.objects.filter(pk=instance.quiz_id).values_list('course_id', flat=True).first()
+    if course_id:
+        stats.adjust(
+            course_id, rebuild_missing=False,
+            attempt_count=-1, score_sum=-instance.score, max_score_sum=-instance.total,
+        )
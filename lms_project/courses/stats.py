@@ -0,0 +1,80 @@
+"""
+Per-course summary counters for the teacher dashboard.
+
+``CourseStats`` rows are adjusted in place as enrollments, completions,
+quiz attempts and open queries come and go (see ``signals.py``,
+``progress.py`` and ``queries/signals.py``), so showing them is a join
+rather than an aggregate over those tables. ``rebuild()`` recomputes
+rows from scratch; use it after bulk inserts, which send no signals, and
+to repair drift (``manage.py rebuild_course_stats``).
+"""
+
+from django.db.models import Count, F, Q, QuerySet, Sum
+from django.db.models.functions import Greatest
+
+from queries.models import Query
+from .models import Course, CourseStats, Enrollment, QuizAttempt
+
+COUNTERS = ('enrollment_count', 'completed_count', 'attempt_count', 'score_sum', 'max_score_sum', 'open_query_count')
+REBUILD_BATCH_SIZE = 1000
+
+
+def adjust(course_id, rebuild_missing=True, **deltas):
+    """
+    Add ``deltas`` (counter name -> amount) to a course's counters. A missing
+    row is rebuilt, unless ``rebuild_missing`` is False: delete receivers pass
+    that, since the course may be going too (deleting its teacher cascades to
+    it), and re-creating its row would fail the delete on the foreign key.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = CourseStats.objects.filter(course_id=course_id).update(**{
+        name: Greatest(F(name) + delta, 0) for name, delta in deltas.items()
+    })
+    if not updated and rebuild_missing:
+        rebuild([course_id])
+
+
+def deleting_course(origin):
+    """
+    Whether a delete signal's ``origin`` is courses being deleted, so their
+    receivers can skip adjusting stats that are about to go with them.
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Course
+
+
+def rebuild(course_ids=None):
+    """Recompute the stats of ``course_ids`` (all courses if None); returns how many."""
+    if course_ids is None:
+        course_ids = Course.objects.order_by('id').values_list('id', flat=True)
+    course_ids = list(course_ids)
+    for start in range(0, len(course_ids), REBUILD_BATCH_SIZE):
+        _rebuild_batch(course_ids[start:start + REBUILD_BATCH_SIZE])
+    return len(course_ids)
+
+
+def _rebuild_batch(course_ids):
+    rows = {course_id: dict.fromkeys(COUNTERS, 0) for course_id in
+            Course.objects.filter(pk__in=course_ids).values_list('id', flat=True)}
+
+    for row in Enrollment.objects.filter(course_id__in=rows).values('course_id').annotate(
+        enrollments=Count('id'), completed=Count('id', filter=Q(completed=True)),
+    ):
+        rows[row['course_id']].update(enrollment_count=row['enrollments'], completed_count=row['completed'])
+
+    for row in QuizAttempt.objects.filter(quiz__course_id__in=rows).values('quiz__course_id').annotate(
+        attempts=Count('id'), score=Sum('score'), total=Sum('total'),
+    ):
+        rows[row['quiz__course_id']].update(
+            attempt_count=row['attempts'], score_sum=row['score'] or 0, max_score_sum=row['total'] or 0,
+        )
+
+    for row in Query.objects.filter(course_id__in=rows, status='Open').values('course_id').annotate(n=Count('id')):
+        rows[row['course_id']]['open_query_count'] = row['n']
+
+    CourseStats.objects.bulk_create(
+        [CourseStats(course_id=course_id, **counters) for course_id, counters in rows.items()],
+        update_conflicts=True, unique_fields=['course'], update_fields=COUNTERS,
+    )
@@ -0,0 +1,141 @@
+"""
+Serving and receiving lesson videos without holding them in memory.
+
+``serve_file`` answers ``Range`` requests with ``206 Partial Content`` so
+players can seek without downloading the whole file. Full responses go
+through ``FileResponse``, which the WSGI server can hand to ``sendfile``.
+When ``settings.SENDFILE_HEADER`` is set (``'X-Accel-Redirect'`` for nginx,
+``'X-Sendfile'`` for Apache), the front-end server streams the file
+instead, ranges included.
+
+``append_chunk`` writes one piece of a resumable upload straight from the
+request stream to the end of a temporary file on disk. It holds a lock on
+the file while it checks the offset and writes, so two requests sending
+the same chunk can't both append it.
+"""
+
+import mimetypes
+import os
+import re
+
+try:
+    import fcntl
+except ImportError:  # Windows: chunks of one upload are not serialised
+    fcntl = None
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date
+
+STREAM_BLOCK_SIZE = 64 * 1024
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single-range ``Range`` header,
+    None if the header should be ignored, or ``'unsatisfiable'``.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match:
+        return None  # absent, malformed or multi-range: send the whole file
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0 or size == 0:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None  # syntactically invalid (RFC 9110 14.1.1), so ignored
+    if start >= size:
+        return 'unsatisfiable'
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(STREAM_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+class OffsetMismatch(Exception):
+    """The chunk was sent for an offset other than the file's length, ``offset``."""
+    def __init__(self, offset):
+        super().__init__(f"The upload has {offset} bytes.")
+        self.offset = offset
+
+
+def serve_file(request, fieldfile):
+    """Stream a FileField's file, honouring ``Range``."""
+    path = fieldfile.path
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("The file is missing.")
+    size = stat.st_size
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    last_modified = http_date(stat.st_mtime)
+
+    sendfile_header = getattr(settings, 'SENDFILE_HEADER', None)
+    if sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        if sendfile_header == 'X-Accel-Redirect':
+            response[sendfile_header] = settings.SENDFILE_URL_PREFIX + fieldfile.name
+        else:
+            response[sendfile_header] = path
+        return response
+
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(path, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = last_modified
+    return response
+
+
+def append_chunk(request, path, offset, size):
+    """
+    Append the request body to ``path``, which must already exist and hold
+    exactly ``offset`` bytes (else OffsetMismatch), reading it in blocks.
+    The file may not grow past ``size`` bytes, and a chunk must add at least
+    one: otherwise it is rolled back and ValueError is raised. Returns the
+    file's new length.
+    """
+    written = 0
+    with open(path, 'r+b') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)  # released when the file is closed
+        start = f.seek(0, os.SEEK_END)
+        if start != offset:
+            raise OffsetMismatch(start)
+        limit = size - start
+        while True:
+            block = request.read(STREAM_BLOCK_SIZE)
+            if not block:
+                break
+            if written + len(block) > limit:
+                f.truncate(start)
+                raise ValueError("Chunk is larger than the remaining upload size.")
+            f.write(block)
+            written += len(block)
+    if not written:
+        raise ValueError("Empty chunk.")
+    return start + written
@@ -0,0 +1,18 @@
+from jobs.queue import task
+
+from . import lesson_import, media, ordering
+
+
+@task('courses.process_lesson_media')
+def process_lesson_media(lesson_id):
+    media.process_lesson(lesson_id)
+
+
+@task('courses.import_lessons')
+def import_lessons(import_id):
+    lesson_import.run_import(import_id)
+
+
+@task(ordering.REBALANCE_TASK)
+def rebalance_lessons(course_id):
+    ordering.rebalance(course_id)
@@ -1,3 +1,573 @@
-from django.test import TestCase
+import base64
+import io
+import os
+import re
+import shutil
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin import AdminSite
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import UserTable
+from jobs.models import Job
+from queries.models import Query
+from lms_project.pagination import InvalidCursor, KeysetPaginator
+from search import index as search
+from . import media, ordering, stats
+from .admin import CourseAdmin
+from .grading import get_answer_key, grade_attempt
+from .models import AttemptAnswer, Course, CourseStats, Enrollment, Lesson, Question, Quiz, QuizAttempt
+from .progress import mark_lesson_complete
+from .rendering import render, sanitize
+from .streaming import parse_range
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'courses-tests'}}
+
+
+class SanitizeTests(SimpleTestCase):
+    def test_keeps_allowed_markup(self):
+        html = '<p>Hi <strong>there</strong> <a href="https://example.com/" title="Ex">link</a></p>'
+        self.assertEqual(
+            sanitize(html),
+            '<p>Hi <strong>there</strong> '
+            '<a href="https://example.com/" title="Ex" rel="nofollow noopener">link</a></p>',
+        )
+
+    def test_drops_javascript_urls(self):
+        for href in (
+            'javascript:alert(1)',
+            'JaVaScRiPt:alert(1)',
+            ' javascript:alert(1)',
+            'java\tscript:alert(1)',
+            'java\nscript:alert(1)',
+            '\x01javascript:alert(1)',
+            'java&#x09;script:alert(1)',
+            'vbscript:msgbox(1)',
+        ):
+            with self.subTest(href=href):
+                self.assertEqual(sanitize(f'<a href="{href}">x</a>'), '<a rel="nofollow noopener">x</a>')
+
+    def test_drops_data_urls_in_src(self):
+        self.assertEqual(sanitize('<img src="data:text/html,<script>alert(1)</script>" alt="a">'), '<img alt="a">')
+
+    def test_keeps_relative_and_mailto_urls(self):
+        self.assertEqual(sanitize('<img src="/static/a.png">'), '<img src="/static/a.png">')
+        self.assertIn('href="mailto:t@example.com"', sanitize('<a href="mailto:t@example.com">t</a>'))
+
+    def test_drops_event_handler_and_style_attributes(self):
+        self.assertEqual(sanitize('<img src="a.png" onerror="alert(1)">'), '<img src="a.png">')
+        self.assertEqual(sanitize('<p onclick="alert(1)" style="color:red">x</p>'), '<p>x</p>')
+        self.assertEqual(sanitize('<a href="#" ONMOUSEOVER="alert(1)">x</a>'), '<a href="#" rel="nofollow noopener">x</a>')
+
+    def test_only_language_classes_on_code(self):
+        self.assertEqual(sanitize('<code class="language-py">x</code>'), '<code class="language-py">x</code>')
+        self.assertEqual(sanitize('<code class="evil">x</code>'), '<code>x</code>')
+
+    def test_escapes_attribute_values(self):
+        self.assertEqual(
+            sanitize('<abbr title=\'"><script>alert(1)</script>\'>x</abbr>'),
+            '<abbr title="&quot;&gt;&lt;script&gt;alert(1)&lt;/script&gt;">x</abbr>',
+        )
+
+    def test_drops_script_and_style_with_their_content(self):
+        self.assertEqual(sanitize('a<script>alert(1)</script>b<style>p{}</style>c'), 'abc')
+
+    def test_nested_drop_content_tags(self):
+        self.assertEqual(sanitize('<iframe><iframe>x</iframe>y</iframe>z'), 'z')
+        self.assertEqual(sanitize('<object><embed><template>x</template>y</object>z'), '')
+        # Inside <script> everything up to the first </script> is text; the rest is escaped.
+        out = sanitize('<script><script></script>alert(1)</script>after')
+        self.assertNotIn('<script', out)
+        self.assertTrue(out.endswith('after'))
+
+    def test_closes_unclosed_tags(self):
+        self.assertEqual(sanitize('<b><i>text'), '<b><i>text</i></b>')
+        self.assertEqual(sanitize('<p>a<b>b</p>c'), '<p>a<b>b</b></p>c')
+        self.assertEqual(sanitize('<div><em>x</div>y'), '<div><em>x</em></div>y')
+
+    def test_drops_stray_end_tags_and_unknown_tags(self):
+        self.assertEqual(sanitize('</div>x</p>'), 'x')
+        self.assertEqual(sanitize('<form action="/"><input name="q">hi</form>'), 'hi')
+
+    def test_escapes_text(self):
+        self.assertEqual(sanitize('1 &lt; 2 &amp;&amp; <b>3 > 2</b>'), '1 &lt; 2 &amp;&amp; <b>3 &gt; 2</b>')
+
+    def test_plain_text_is_escaped(self):
+        self.assertEqual(render('<script>x</script>\n\nnext', 'text'), '<p>&lt;script&gt;x&lt;/script&gt;</p>\n\n<p>next</p>')
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ignored_headers(self):
+        for header in (None, '', 'bytes=', 'bytes=-', 'items=0-1', 'bytes=0-1,4-5', 'bytes=a-b', 'bytes=5-3'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 100))
+
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-0', 100), (0, 0))
+        self.assertEqual(parse_range('bytes=10-19', 100), (10, 19))
+        self.assertEqual(parse_range(' bytes=90- ', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=90-1000', 100), (90, 99))
+
+    def test_suffix_ranges(self):
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-1000', 100), (0, 99))
+
+    def test_unsatisfiable(self):
+        self.assertEqual(parse_range('bytes=100-', 100), 'unsatisfiable')
+        self.assertEqual(parse_range('bytes=100-200', 100), 'unsatisfiable')
+        self.assertEqual(parse_range('bytes=-0', 100), 'unsatisfiable')
+        self.assertEqual(parse_range('bytes=0-', 0), 'unsatisfiable')
+        self.assertEqual(parse_range('bytes=-10', 0), 'unsatisfiable')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class VideoUploadTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        teacher = User.objects.create_user('teacher', password='x')
+        UserTable.objects.create(user=teacher, role='TEACHER')
+        course = Course.objects.create(title='Course', description='', teacher=teacher)
+        self.lesson = Lesson.objects.create(course=course, title='One', content='', order=1024)
+        self.client.force_login(teacher)
+        response = self.client.post(
+            reverse('start_video_upload', args=[course.id, self.lesson.id, 1]), {'filename': 'clip.mp4', 'size': 10},
+        )
+        self.url = response.json()['url']
+
+    def send(self, body, offset):
+        return self.client.post(self.url, body, content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+
+    def test_chunks_at_the_wrong_offset_are_refused(self):
+        self.assertEqual(self.send(b'01234', 0).json()['offset'], 5)
+        # The same chunk again, as a retry racing the first would send it.
+        response = self.send(b'01234', 0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 5)
+        self.assertEqual(self.send(b'x', 'nonsense').status_code, 409)
+
+    def test_the_last_chunk_finishes_the_upload_once(self):
+        self.send(b'01234', 0)
+        self.assertEqual(self.send(b'0123456', 5).status_code, 400)  # too long, and rolled back
+        response = self.send(b'56789', 5)
+        self.assertTrue(response.json()['complete'])
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.video_1.read(), b'0123456789')
+        self.lesson.video_1.close()
+        self.assertEqual(self.send(b'', 10).status_code, 404)
+
+    def test_a_missing_video_file_is_404(self):
+        self.send(b'0123456789', 0)
+        self.lesson.refresh_from_db()
+        url = reverse('lesson_video', args=[self.lesson.course_id, self.lesson.id, 1])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        os.remove(self.lesson.video_1.path)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_processing_a_missing_video_fails_the_lesson(self):
+        self.send(b'0123456789', 0)
+        self.lesson.refresh_from_db()
+        os.remove(self.lesson.video_1.path)
+        media.process_lesson(self.lesson.id)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.media_status, Lesson.MEDIA_FAILED)
+        self.assertIn('error', self.lesson.media_info['video_1'])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LessonOrderingTests(TestCase):
+    def setUp(self):
+        teacher = User.objects.create_user('teacher', password='x')
+        self.course = Course.objects.create(title='Course', description='', teacher=teacher)
+
+    def add(self, title, order=None):
+        if order is None:
+            order = ordering.next_order(self.course.id)
+        return Lesson.objects.create(course=self.course, title=title, content='', order=order)
+
+    def titles(self):
+        return list(self.course.lessons.values_list('title', flat=True))
+
+    def orders(self):
+        return dict(self.course.lessons.values_list('title', 'order'))
+
+    def rebalance_jobs(self):
+        return Job.objects.filter(name=ordering.REBALANCE_TASK, status=Job.QUEUED).count()
+
+    def test_new_lessons_go_last_step_apart(self):
+        for title in 'abc':
+            self.add(title)
+        self.assertEqual(self.orders(), {'a': 1024, 'b': 2048, 'c': 3072})
+
+    def test_moving_between_two_lessons_updates_only_that_row(self):
+        a, b, c, d = (self.add(title) for title in 'abcd')
+        ordering.move_lesson(d, after=a)
+        self.assertEqual(self.titles(), ['a', 'd', 'b', 'c'])
+        self.assertEqual(self.orders(), {'a': 1024, 'd': 1536, 'b': 2048, 'c': 3072})
+        self.assertEqual(self.rebalance_jobs(), 0)
+
+    def test_moving_to_the_top_and_the_end(self):
+        a, b, c = (self.add(title) for title in 'abc')
+        ordering.move_lesson(c, after=None)
+        self.assertEqual(self.titles(), ['c', 'a', 'b'])
+        ordering.move_lesson(a, after=b)
+        self.assertEqual(self.titles(), ['c', 'b', 'a'])
+        self.assertEqual(self.orders()['a'], 2048 + ordering.STEP)
+
+    def test_moving_into_a_closed_gap_renumbers_the_course(self):
+        a, b, c = self.add('a', 1024), self.add('b', 1025), self.add('c', 4096)
+        key = ordering.move_lesson(c, after=a)
+        self.assertEqual(self.titles(), ['a', 'c', 'b'])
+        self.assertEqual(self.orders(), {'a': 1024, 'c': 2048, 'b': 3072})
+        self.assertEqual(key, 2048)
+
+    def test_moving_to_the_top_past_key_one_renumbers_the_course(self):
+        a, b = self.add('a', 1), self.add('b', 2)
+        ordering.move_lesson(b, after=None)
+        self.assertEqual(self.titles(), ['b', 'a'])
+        self.assertEqual(self.orders(), {'b': 1024, 'a': 2048})
+
+    def test_equal_keys_are_ordered_by_id(self):
+        a, b, c = self.add('a', 1024), self.add('b', 1024), self.add('c', 2048)
+        self.assertEqual(self.titles(), ['a', 'b', 'c'])
+        ordering.move_lesson(c, after=a)
+        self.assertEqual(self.titles(), ['a', 'c', 'b'])
+
+    def test_narrow_gap_queues_one_rebalance(self):
+        a, b = self.add('a'), self.add('b')
+        movers = [self.add(f'm{n}') for n in range(8)]
+        for mover in movers:
+            ordering.move_lesson(mover, after=a)
+        self.assertEqual(self.titles(), ['a', 'm7', 'm6', 'm5', 'm4', 'm3', 'm2', 'm1', 'm0', 'b'])
+        self.assertEqual(self.rebalance_jobs(), 1)
+        ordering.move_lesson(movers[0], after=a)  # narrower still, but a rebalance is already queued
+        self.assertEqual(self.rebalance_jobs(), 1)
+
+        before = self.titles()
+        ordering.rebalance(self.course.id)
+        self.assertEqual(self.titles(), before)
+        self.assertEqual(sorted(self.orders().values()), [n * ordering.STEP for n in range(1, 11)])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        teacher = User.objects.create_user('teacher', password='x')
+        student = User.objects.create_user('student', password='x')
+        UserTable.objects.create(user=student, role='STUDENT')
+        self.course = Course.objects.create(title='Course', description='', teacher=teacher)
+        self.lesson = Lesson.objects.create(course=self.course, title='One', content='Hello', order=1024)
+        Enrollment.objects.create(student=student, course=self.course)
+        self.lesson_url = reverse('lesson_view', args=[self.course.id, self.lesson.id])
+        self.course_url = reverse('course_detail', args=[self.course.id])
+
+    def log_in(self, client):
+        # Through the login view, so the welcome message is queued and the CSRF token rotated.
+        client.get(reverse('login'))
+        response = client.post(reverse('login'), {
+            'username': 'student', 'password': 'x', 'csrfmiddlewaretoken': client.cookies['csrftoken'].value,
+        }, follow=True)
+        self.assertContains(response, 'Welcome back, student!')
+
+    def revalidate(self, client, url, etag):
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_logged_in_users_get_304s(self):
+        self.log_in(self.client)
+        for url in (self.lesson_url, self.course_url):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(self.revalidate(self.client, url, first['ETag']).status_code, 304)
+
+    def test_edits_invalidate_the_lesson_page(self):
+        self.log_in(self.client)
+        etag = self.client.get(self.lesson_url)['ETag']
+        self.lesson.title = 'One, revised'
+        self.lesson.save()
+        response = self.revalidate(self.client, self.lesson_url, etag)
+        self.assertContains(response, 'One, revised')
+
+    def test_update_fields_saves_invalidate_the_course_page(self):
+        self.log_in(self.client)
+        etag = self.client.get(self.course_url)['ETag']
+        self.course.title = 'Renamed'
+        self.course.save(update_fields=['title'])
+        response = self.revalidate(self.client, self.course_url, etag)
+        self.assertContains(response, 'Renamed')
+
+    def test_pending_messages_are_shown_not_revalidated(self):
+        self.log_in(self.client)
+        etag = self.client.get(self.course_url)['ETag']
+        self.client.get(reverse('enroll_course', args=[self.course.id]))  # queues "already enrolled"
+        response = self.revalidate(self.client, self.course_url, etag)
+        self.assertContains(response, 'You are already enrolled in this course.')
+        # Rendering the message consumed it.
+        self.assertEqual(self.revalidate(self.client, self.course_url, etag).status_code, 304)
+
+    def test_logging_in_again_does_not_revalidate_a_stale_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        self.log_in(client)
+        etag = client.get(self.lesson_url)['ETag']
+        client.post(reverse('logout'), {'csrfmiddlewaretoken': client.cookies['csrftoken'].value})
+        self.log_in(client)
+
+        response = self.revalidate(client, self.lesson_url, etag)
+        self.assertEqual(response.status_code, 200)
+        token = response.context['csrf_token']
+        response = client.post(
+            reverse('complete_lesson', args=[self.course.id, self.lesson.id]), {'csrfmiddlewaretoken': token},
+        )
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CourseAdminSearchTests(TestCase):
+    def test_matches_titles_and_partial_teacher_names(self):
+        alice = User.objects.create_user('alice.smith', password='x')
+        bob = User.objects.create_user('bob', password='x')
+        Course.objects.create(title='Organic chemistry', description='', teacher=alice)
+        Course.objects.create(title='Algebra', description='', teacher=bob)
+        Course.objects.create(title='Smithing basics', description='', teacher=bob)
+        search.rebuild([Course.objects.all()])
+
+        model_admin = CourseAdmin(Course, AdminSite())
+        for term, titles in (('chem', ['Organic chemistry']), ('alice', ['Organic chemistry']),
+                             ('smith', ['Organic chemistry', 'Smithing basics'])):
+            with self.subTest(term=term):
+                queryset, _ = model_admin.get_search_results(None, Course.objects.all(), term)
+                self.assertEqual(sorted(queryset.values_list('title', flat=True)), titles)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class GradingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = User.objects.create_user('teacher', password='x')
+        self.student = User.objects.create_user('student', password='x')
+        course = Course.objects.create(title='Course', description='', teacher=teacher)
+        self.quiz = Quiz.objects.create(course=course, title='Quiz', created_by=teacher)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, text=f'Q{n}', option_a='a', option_b='b', correct_option=option)
+            for n, option in enumerate('ABA')
+        ]
+
+    def grade(self, *selected):
+        data = {f'q_{q.id}': option for q, option in zip(self.questions, selected) if option is not None}
+        return grade_attempt(self.quiz, self.student, data)
+
+    def test_scores_against_the_answer_key(self):
+        attempt = self.grade('A', 'A', None)
+        self.assertEqual((attempt.score, attempt.total), (1, 3))
+        answers = list(attempt.answers.order_by('question_id').values_list('question_id', 'selected_option', 'is_correct'))
+        self.assertEqual(answers, [
+            (self.questions[0].id, 'A', True), (self.questions[1].id, 'A', False), (self.questions[2].id, '', False),
+        ])
+        # Only the first character of a submitted option is kept.
+        self.assertEqual(self.grade('AB', 'B', 'A').answers.get(question=self.questions[0]).selected_option, 'A')
+
+    def test_answers_are_saved_in_one_insert_without_reading_questions(self):
+        get_answer_key(self.quiz.id)  # warm the cache
+        with CaptureQueriesContext(connection) as queries:
+            self.grade('A', 'B', 'A')
+        sql = [q['sql'] for q in queries.captured_queries]
+        self.assertEqual(sum('INSERT INTO "courses_attemptanswer"' in s for s in sql), 1)
+        self.assertFalse([s for s in sql if 'FROM "courses_question"' in s])
+        self.assertEqual(AttemptAnswer.objects.count(), 3)
+
+    def test_question_changes_invalidate_the_answer_key(self):
+        first, second, third = self.questions
+        self.assertEqual(self.grade('A', 'B', 'A').score, 3)
+
+        second.correct_option = 'A'
+        second.save()
+        self.assertEqual(self.grade('A', 'B', 'A').score, 2)
+
+        added = Question.objects.create(quiz=self.quiz, text='Q3', option_a='a', option_b='b', correct_option='B')
+        self.assertEqual(get_answer_key(self.quiz.id)[-1], (added.id, 'B'))
+        third.delete()
+        self.assertEqual(get_answer_key(self.quiz.id), [(first.id, 'A'), (second.id, 'A'), (added.id, 'B')])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CourseStatsTests(TestCase):
+    def fresh_counts(self, course):
+        attempts = QuizAttempt.objects.filter(quiz__course=course)
+        return {
+            'enrollment_count': course.enrollments.count(),
+            'completed_count': course.enrollments.filter(completed=True).count(),
+            'attempt_count': attempts.count(),
+            'score_sum': sum(attempts.values_list('score', flat=True)),
+            'max_score_sum': sum(attempts.values_list('total', flat=True)),
+            'open_query_count': Query.objects.filter(course=course, status='Open').count(),
+        }
+
+    def assert_counters_match(self, *courses):
+        for course in courses:
+            row = CourseStats.objects.get(course=course)
+            with self.subTest(course=course.title):
+                self.assertEqual({name: getattr(row, name) for name in stats.COUNTERS}, self.fresh_counts(course))
+
+    def test_counters_follow_enrolments_completions_attempts_and_deletes(self):
+        owner = User.objects.create_user('owner', password='x')
+        leaving = User.objects.create_user('leaving', password='x')
+        ann, ben = (User.objects.create_user(name, password='x') for name in ('ann', 'ben'))
+        kept = Course.objects.create(title='Kept', description='', teacher=owner)
+        gone = Course.objects.create(title='Gone', description='', teacher=leaving)
+        lesson = Lesson.objects.create(course=kept, title='One', content='', order=1024)
+
+        enrollments = {student: Enrollment.objects.create(student=student, course=kept) for student in (ann, ben)}
+        Enrollment.objects.create(student=ann, course=gone)
+        mark_lesson_complete(enrollments[ann], lesson)
+        mark_lesson_complete(enrollments[ben], lesson)
+        Query.objects.create(title='Help', description='', course=kept, created_by=ann)
+
+        # A quiz in the kept course, written by the teacher who is about to leave.
+        quiz = Quiz.objects.create(course=kept, title='Quiz', created_by=leaving)
+        question = Question.objects.create(quiz=quiz, text='?', option_a='a', option_b='b', correct_option='A')
+        grade_attempt(quiz, ann, {f'q_{question.id}': 'A'})
+        retaken = grade_attempt(quiz, ben, {f'q_{question.id}': 'B'})
+        own_quiz = Quiz.objects.create(course=kept, title='Own quiz', created_by=owner)
+        Question.objects.create(quiz=own_quiz, text='?', option_a='a', option_b='b', correct_option='B')
+        grade_attempt(own_quiz, ben, {})
+        self.assert_counters_match(kept, gone)
+
+        retaken.delete()
+        enrollments[ben].delete()
+        Lesson.objects.create(course=kept, title='Two', content='', order=2048)  # reopens ann's enrollment
+        self.assert_counters_match(kept, gone)
+
+        leaving.delete()  # takes the other course and the first quiz's attempts with it
+        self.assertFalse(CourseStats.objects.filter(course=gone).exists())
+        self.assert_counters_match(kept)
+
+        before = {name: getattr(CourseStats.objects.get(course=kept), name) for name in stats.COUNTERS}
+        call_command('rebuild_course_stats', stdout=io.StringIO())
+        self.assertEqual({name: getattr(CourseStats.objects.get(course=kept), name) for name in stats.COUNTERS}, before)
+        self.assert_counters_match(kept)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    READ_REPLICAS=dict(settings.READ_REPLICAS, ALIASES=['replica']),
+    # Sessions read from the database, so the test can see where that read goes.
+    SESSION_ENGINE='django.contrib.sessions.backends.db',
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    # 'replica' mirrors default's test database; outside a TestCase transaction
+    # it sees the rows written here.
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        teacher = User.objects.create_user('teacher', password='x')
+        student = User.objects.create_user('student', password='x')
+        UserTable.objects.create(user=student, role='STUDENT')
+        self.course = Course.objects.create(title='Course', description='', teacher=teacher)
+        self.client.force_login(student)
+
+    def get(self, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 400)
+        return response, self.tables(primary), self.tables(replica)
+
+    @staticmethod
+    def tables(queries):
+        """The tables the captured SELECTs read from (not joined to)."""
+        return {re.search(r'FROM "(\w+)"', q['sql'])[1] for q in queries.captured_queries if q['sql'].startswith('SELECT')}
+
+    def test_plain_reads_go_to_the_replica_without_sticking(self):
+        response, primary, replica = self.get(reverse('course_detail', args=[self.course.id]))
+        self.assertIn('courses_course', replica)
+        self.assertNotIn(settings.READ_REPLICAS['STICKY_COOKIE'], response.cookies)
+
+    def test_session_and_auth_lookups_stay_on_default(self):
+        _, primary, replica = self.get(reverse('course_detail', args=[self.course.id]))
+        self.assertTrue({'django_session', 'auth_user'} <= primary)
+        self.assertFalse({'django_session', 'auth_user'} & replica)
+
+    def test_a_get_that_writes_sets_the_sticky_cookie(self):
+        cookie = settings.READ_REPLICAS['STICKY_COOKIE']
+        response, _, _ = self.get(reverse('enroll_course', args=[self.course.id]))  # a GET that enrolls
+        self.assertIn(cookie, response.cookies)
+
+        # The next reads come from default, where the enrollment already is.
+        response, primary, replica = self.get(reverse('course_detail', args=[self.course.id]))
+        self.assertFalse(replica)
+        self.assertIn('courses_enrollment', primary)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        teacher = User.objects.create_user('teacher', password='x')
+        Course.objects.bulk_create(Course(title=f'c{n:02}', description='', teacher=teacher) for n in range(7))
+        # Pairs of courses created at the same moment, so the id has to break ties.
+        base = timezone.now()
+        for n, course in enumerate(Course.objects.order_by('id')):
+            Course.objects.filter(pk=course.pk).update(created_at=base - timedelta(minutes=n // 2))
+
+    def paginator(self, ordering=('-created_at', '-id'), page_size=2):
+        return KeysetPaginator(Course.objects.all(), ordering, page_size)
+
+    def walk(self, paginator):
+        pages, cursor = [], None
+        while True:
+            items, cursor = paginator.page(cursor)
+            pages.append([c.title for c in items])
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = list(Course.objects.order_by('-created_at', '-id').values_list('title', flat=True))
+        pages = self.walk(self.paginator())
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_ascending_ordering(self):
+        pages = self.walk(self.paginator(('title', 'id'), page_size=3))
+        self.assertEqual(sum(pages, []), [f'c{n:02}' for n in range(7)])
+
+    def test_no_next_cursor_when_the_last_page_is_full(self):
+        pages = self.walk(self.paginator(page_size=7))
+        self.assertEqual([len(page) for page in pages], [7])
+
+    def test_rows_added_meanwhile_do_not_shift_later_pages(self):
+        paginator = self.paginator(page_size=3)
+        first, cursor = paginator.page()
+        Course.objects.create(title='newest', description='', teacher=first[0].teacher)
+        second, _ = paginator.page(cursor)
+        self.assertNotIn('newest', [c.title for c in second])
+        self.assertFalse({c.pk for c in first} & {c.pk for c in second})
+
+    def test_cursor_round_trip(self):
+        paginator = self.paginator()
+        course = Course.objects.order_by('id').first()
+        self.assertEqual(paginator.decode_cursor(paginator.encode_cursor(course)), [course.created_at, course.id])
+
+    def test_invalid_cursors(self):
+        paginator = self.paginator()
+        too_short = base64.urlsafe_b64encode(b'[1]').decode()
+        not_a_date = base64.urlsafe_b64encode(b'["yesterday", 1]').decode()
+        for cursor in ('garbage!', 'e30', too_short, not_a_date):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                paginator.page(cursor)
+
+    async def test_async_page_matches_page(self):
+        paginator = self.paginator(page_size=3)
+        items, cursor = await paginator.apage()
+        sync_items, sync_cursor = await sync_to_async(paginator.page)()
+        self.assertEqual([c.pk for c in items], [c.pk for c in sync_items])
+        self.assertEqual(cursor, sync_cursor)
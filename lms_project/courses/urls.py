@@ -1,24 +1,43 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI the dashboards come from the async views.
+dashboards = views
+if settings.ASYNC_VIEWS:
+    from . import async_views as dashboards
+
 urlpatterns = [
     # Dashboards
-    path('teacher/dashboard/', views.teacher_dashboard, name='teacher_dashboard'),
-    path('student/dashboard/', views.student_dashboard, name='student_dashboard'),
+    path('teacher/dashboard/', dashboards.teacher_dashboard, name='teacher_dashboard'),
+    path('student/dashboard/', dashboards.student_dashboard, name='student_dashboard'),
 
     # Course + Lessons
     path('', views.course_list, name='course_list'),
+    path('catalog/', views.course_catalog, name='course_catalog'),
     path('course/<int:course_id>/', views.course_detail, name='course_detail'),
     path('course/<int:course_id>/enroll/', views.enroll_course, name='enroll_course'),
-    path('my-courses/', views.my_courses, name='my_courses'),
+    path('my-courses/', dashboards.my_courses, name='my_courses'),
     path('course/<int:course_id>/lesson/<int:lesson_id>/', views.lesson_view, name='lesson_view'),
+    path('course/<int:course_id>/lesson/<int:lesson_id>/complete/', views.complete_lesson, name='complete_lesson'),
+
+    # Lesson Videos
+    path('course/<int:course_id>/lesson/<int:lesson_id>/video/<int:slot>/', views.lesson_video, name='lesson_video'),
+    path('course/<int:course_id>/lesson/<int:lesson_id>/video/<int:slot>/poster/', views.lesson_video_poster, name='lesson_video_poster'),
+    path('course/<int:course_id>/lesson/<int:lesson_id>/video/<int:slot>/upload/', views.start_video_upload, name='start_video_upload'),
+    path('video-uploads/<uuid:upload_id>/', views.video_upload_chunk, name='video_upload_chunk'),
 
     # Teacher Actions
     path('create-course/', views.create_course, name='create_course'),
     path('course/<int:course_id>/create-lesson/', views.create_lesson, name='create_lesson'),
+    path('course/<int:course_id>/lessons/reorder/', views.reorder_lesson, name='reorder_lesson'),
+    path('course/<int:course_id>/import-lessons/', views.import_lessons, name='import_lessons'),
+    path('lesson-imports/<uuid:import_id>/', views.lesson_import_status, name='lesson_import_status'),
+    path('course/<int:course_id>/progress/', views.course_progress, name='course_progress'),
 
     # Quiz Functionality
     path('course/<int:course_id>/create-quiz/', views.create_quiz, name='create_quiz'),
     path('quiz/<int:quiz_id>/add-question/', views.add_question, name='add_question'),
     path('quiz/<int:quiz_id>/attempt/', views.attempt_quiz, name='attempt_quiz'),
+    path('quiz/<int:quiz_id>/questions.json', views.quiz_questions, name='quiz_questions'),
 ]
\ No newline at end of file
@@ -1,64 +1,148 @@
-from django.shortcuts import render, get_object_or_404, redirect
-from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseForbidden
-from django.contrib import messages
-from .models import Course, Lesson, Enrollment, Quiz, Question
-from .forms import CourseForm, LessonForm, QuizForm, QuestionForm
+import os
 
-
-# ---- Role Check Decorator ----
-def teacher_required(view_func):
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            return redirect('login')
-        if not hasattr(request.user, 'usertable') or request.user.usertable.role != 'TEACHER':
-            return HttpResponseForbidden("Access denied: Teacher only.")
-        return view_func(request, *args, **kwargs)
-    return wrapper
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.files import File
+from django.db.models import Count, Max
+from django.db.models.fields.files import FieldFile
+from django.http import Http404, HttpResponseForbidden, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import render, get_object_or_404, redirect
+from django.template.defaultfilters import date as date_filter
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.text import Truncator
+from django.views.decorators.http import require_POST, require_http_methods
+from accounts.decorators import teacher_required, student_required
+from lms_project.conditional import conditional_render
+from lms_project.pagination import KeysetPaginator, InvalidCursor
+from .models import Course, Lesson, LessonImport, Enrollment, Quiz, Question, VideoUpload
+from .forms import CourseForm, LessonForm, LessonImportForm, QuizForm, QuestionForm
+from .grading import grade_attempt
+from .quiz_delivery import student_quiz
+from .progress import with_progress, mark_lesson_complete, is_lesson_complete
+from .page_cache import get_course_content
+from .lesson_import import queue_import
+from .ordering import move_lesson, next_order
+from .media import queue_media_processing
+from .streaming import serve_file, append_chunk, OffsetMismatch
+
+CATALOG_PAGE_SIZE = 24
+
+
+# ---- Catalog Pagination ----
+def catalog_paginator():
+    """The course catalog, newest first, with only the card columns."""
+    courses = Course.objects.select_related('teacher').only(
+        'id', 'title', 'description', 'created_at', 'teacher__username'
+    )
+    return KeysetPaginator(courses, ('-created_at', '-id'), CATALOG_PAGE_SIZE)
+
+
+def catalog_page(cursor=None):
+    """One keyset page of the course catalog."""
+    return catalog_paginator().page(cursor)
+
+
+def enrolled_course_ids(user, courses):
+    """IDs of ``courses`` the user is enrolled in (looked up for this page only)."""
+    if not user.is_authenticated:
+        return set()
+    return set(Enrollment.objects.filter(
+        student=user, course_id__in=[c.id for c in courses]
+    ).values_list('course_id', flat=True))
 
 
 # ---------------------- STUDENT DASHBOARD ----------------------
-@login_required
+@student_required
 def student_dashboard(request):
-    """Display all available courses with enrollment status."""
-    if not hasattr(request.user, 'usertable') or request.user.usertable.role != 'STUDENT':
-        return HttpResponseForbidden("Access denied: Students only.")
-    
-    courses = Course.objects.all().order_by('-created_at')
-    enrolled_ids = Enrollment.objects.filter(student=request.user).values_list('course_id', flat=True)
+    """Display available courses with enrollment status, one page at a time."""
+    try:
+        courses, next_cursor = catalog_page(request.GET.get('cursor'))
+    except InvalidCursor:
+        courses, next_cursor = catalog_page()
 
     return render(request, 'accounts/student_dashboard.html', {
         'courses': courses,
-        'enrolled_ids': list(enrolled_ids)
+        'enrolled_ids': enrolled_course_ids(request.user, courses),
+        'next_cursor': next_cursor,
     })
 
 
 # ---------------------- Public / Student Views ----------------------
 
 def course_list(request):
-    courses = Course.objects.all().order_by('-created_at')
-    return render(request, 'courses/course_list.html', {'courses': courses})
+    cursor = request.GET.get('cursor')
+    # One query; the count catches deletions, which leave no newer timestamp behind.
+    latest = Course.objects.aggregate(updated_at=Max('updated_at'), count=Count('id'))
+
+    def context():
+        try:
+            courses, next_cursor = catalog_page(cursor)
+        except InvalidCursor:
+            courses, next_cursor = catalog_page()
+        return {'courses': courses, 'next_cursor': next_cursor}
+
+    return conditional_render(
+        request, 'courses/course_list.html', context,
+        last_modified=latest['updated_at'], etag_parts=(latest['count'], cursor),
+    )
+
+
+def course_catalog(request):
+    """JSON "load more" endpoint for the catalog cards."""
+    try:
+        courses, next_cursor = catalog_page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor.")
+
+    enrolled_ids = enrolled_course_ids(request.user, courses)
+    results = [{
+        'id': c.id,
+        'title': c.title,
+        'summary': Truncator(c.description).words(25),
+        'teacher': c.teacher.username,
+        'created_at': c.created_at.isoformat(),
+        'created_on': date_filter(c.created_at, 'M d, Y'),
+        'enrolled': c.id in enrolled_ids,
+        'detail_url': reverse('course_detail', args=[c.id]),
+        'enroll_url': reverse('enroll_course', args=[c.id]),
+    } for c in courses]
+    return JsonResponse({'results': results, 'next_cursor': next_cursor})
 
 
 def course_detail(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
+    """The course page: shared content from the cache, plus this user's enrollment badge."""
+    course_row = Course.objects.filter(id=course_id).values_list('content_updated_at', 'teacher_id').first()
+    if course_row is None:
+        raise Http404("No Course matches the given query.")
+    content_updated_at, teacher_id = course_row
+    can_reorder = request.user.id == teacher_id
     user_enrolled = False
-    if request.user.is_authenticated:
-        user_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
-    lessons = course.lessons.all().order_by('order')
-    quizzes = course.quizzes.all()
-    return render(request, 'courses/course_detail.html', {
-        'course': course,
-        'lessons': lessons,
-        'quizzes': quizzes,
-        'user_enrolled': user_enrolled
-    })
+    if request.role == 'STUDENT':
+        user_enrolled = Enrollment.objects.filter(student=request.user, course_id=course_id).exists()
+
+    def context():
+        content = get_course_content(course_id)
+        return {
+            'course_id': course_id,
+            'course_title': content['title'],
+            'course_header': content['header'],
+            'course_contents': content['contents'],
+            'user_enrolled': user_enrolled,
+            'can_reorder': can_reorder,
+        }
+
+    return conditional_render(
+        request, 'courses/course_detail.html', context,
+        last_modified=content_updated_at, etag_parts=(user_enrolled, can_reorder),
+    )
 
 
 @login_required
 def enroll_course(request, course_id):
     course = get_object_or_404(Course, id=course_id)
-    if request.user.usertable.role != 'STUDENT':
+    if request.role != 'STUDENT':
         messages.error(request, "Only students can enroll.")
         return redirect('course_detail', course_id=course.id)
 
@@ -72,10 +156,10 @@ def enroll_course(request, course_id):
 
 @login_required
 def my_courses(request):
-    if request.user.usertable.role == 'STUDENT':
-        enrollments = Enrollment.objects.filter(student=request.user)
+    if request.role == 'STUDENT':
+        enrollments = with_progress(Enrollment.objects.filter(student=request.user))
         return render(request, 'courses/my_courses_student.html', {'enrollments': enrollments})
-    elif request.user.usertable.role == 'TEACHER':
+    elif request.role == 'TEACHER':
         courses = Course.objects.filter(teacher=request.user).order_by('-created_at')
         return render(request, 'courses/my_courses_teacher.html', {'courses': courses})
     else:
@@ -83,27 +167,180 @@ def my_courses(request):
         return redirect('course_list')
 
 
+def lesson_access_error(request, course):
+    """Return a 403 response if the user may not see this course's lessons, else None."""
+    if request.role == 'STUDENT' and not Enrollment.objects.filter(student=request.user, course=course).exists():
+        return HttpResponseForbidden("You must enroll to view this lesson.")
+    if request.role == 'TEACHER' and course.teacher_id != request.user.id:
+        return HttpResponseForbidden("Access denied: Not your course.")
+    return None
+
+
 @login_required
 def lesson_view(request, course_id, lesson_id):
-    course = get_object_or_404(Course, id=course_id)
-    lesson = get_object_or_404(Lesson, id=lesson_id, course=course)
+    # One query for both; the raw content is only needed if the HTML was never rendered.
+    lesson = get_object_or_404(
+        Lesson.objects.select_related('course').defer('content'), id=lesson_id, course_id=course_id,
+    )
+    course = lesson.course
+
+    denied = lesson_access_error(request, course)
+    if denied:
+        return denied
+
+    is_complete = request.role == 'STUDENT' and is_lesson_complete(request.user, lesson)
+    return conditional_render(
+        request, 'courses/lesson_view.html',
+        lambda: {
+            'course': course,
+            'lesson': lesson,
+            'is_owner': course.teacher_id == request.user.id,
+            'is_complete': is_complete,
+        },
+        last_modified=max(lesson.updated_at, course.updated_at),
+        # Processing results are saved with update(), which leaves updated_at alone.
+        etag_parts=(lesson.media_status, lesson.content_hash, is_complete),
+    )
+
+
+@student_required
+@require_POST
+def complete_lesson(request, course_id, lesson_id):
+    enrollment = get_object_or_404(Enrollment, student=request.user, course_id=course_id)
+    lesson = get_object_or_404(Lesson, id=lesson_id, course_id=course_id)
+
+    _, finished_course = mark_lesson_complete(enrollment, lesson)
+    if finished_course:
+        messages.success(request, 'Congratulations, you have completed every lesson in this course!')
+    else:
+        messages.success(request, f'"{lesson.title}" marked as complete.')
+    return redirect('lesson_view', course_id=course_id, lesson_id=lesson_id)
 
-    if request.user.usertable.role == 'STUDENT' and not Enrollment.objects.filter(student=request.user, course=course).exists():
-        return HttpResponseForbidden("You must enroll to view this lesson.")
-    if request.user.usertable.role == 'TEACHER' and course.teacher != request.user:
+
+# ---------------------- Lesson Videos ----------------------
+
+@login_required
+def lesson_video(request, course_id, lesson_id, slot):
+    """Stream a lesson video with HTTP range support, to users who may view the lesson."""
+    lesson = get_object_or_404(Lesson.objects.select_related('course'), id=lesson_id, course_id=course_id)
+    denied = lesson_access_error(request, lesson.course)
+    if denied:
+        return denied
+
+    video = getattr(lesson, f'video_{slot}', None) if slot in (1, 2) else None
+    if not video:
+        raise Http404("No such video.")
+    return serve_file(request, video)
+
+
+@login_required
+def lesson_video_poster(request, course_id, lesson_id, slot):
+    """The poster frame ``courses.media`` grabbed from a lesson video, to users who may view the lesson."""
+    lesson = get_object_or_404(Lesson.objects.select_related('course'), id=lesson_id, course_id=course_id)
+    denied = lesson_access_error(request, lesson.course)
+    if denied:
+        return denied
+
+    poster = lesson.media_info.get(f'video_{slot}', {}).get('poster') if slot in (1, 2) else None
+    if not poster:
+        raise Http404("No such poster.")
+    return serve_file(request, FieldFile(lesson, lesson._meta.get_field(f'video_{slot}'), poster))
+
+
+@teacher_required
+@require_POST
+def start_video_upload(request, course_id, lesson_id, slot):
+    """Begin a resumable upload; the file is then sent in chunks to ``video_upload_chunk``."""
+    lesson = get_object_or_404(Lesson.objects.select_related('course'), id=lesson_id, course_id=course_id)
+    if lesson.course.teacher_id != request.user.id:
         return HttpResponseForbidden("Access denied: Not your course.")
+    if slot not in (1, 2):
+        raise Http404("No such video.")
 
-    return render(request, 'courses/lesson_view.html', {'course': course, 'lesson': lesson})
+    filename = os.path.basename(request.POST.get('filename', '')).strip()
+    try:
+        size = int(request.POST.get('size', ''))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid size.")
+    if not filename or not 0 < size <= settings.VIDEO_UPLOAD_MAX_SIZE:
+        return HttpResponseBadRequest("Invalid file name or size.")
+
+    upload = VideoUpload.objects.create(lesson=lesson, slot=slot, filename=filename, size=size, created_by=request.user)
+    os.makedirs(os.path.dirname(upload.temp_path), exist_ok=True)
+    open(upload.temp_path, 'wb').close()
+
+    return JsonResponse({
+        'upload_id': str(upload.id),
+        'url': reverse('video_upload_chunk', args=[upload.id]),
+        'offset': 0,
+        'size': size,
+    }, status=201)
+
+
+@teacher_required
+@require_http_methods(['GET', 'POST'])
+def video_upload_chunk(request, upload_id):
+    """
+    GET reports how many bytes have arrived, so a client can resume.
+    POST appends the raw request body at ``Upload-Offset``; when the last
+    byte arrives the file is moved into storage and set on the lesson.
+    """
+    upload = get_object_or_404(VideoUpload.objects.select_related('lesson'), id=upload_id, created_by=request.user)
+
+    if request.method == 'GET':
+        return JsonResponse({'offset': upload.received, 'size': upload.size, 'complete': False})
+
+    offset = request.headers.get('Upload-Offset', '')
+    try:
+        received = append_chunk(request, upload.temp_path, int(offset) if offset.isdigit() else -1, upload.size)
+    except OffsetMismatch as exc:
+        return JsonResponse({'error': 'Offset mismatch.', 'offset': exc.offset, 'size': upload.size}, status=409)
+    except FileNotFoundError:
+        # Another request has just sent the last chunk and finished the upload.
+        raise Http404("No such upload.")
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc), 'offset': upload.received, 'size': upload.size}, status=400)
+
+    # Only the request that wrote the last byte gets here with the whole file.
+    if received < upload.size:
+        return JsonResponse({'offset': received, 'size': upload.size, 'complete': False})
+
+    lesson = upload.lesson
+    field_name = f'video_{upload.slot}'
+    with open(upload.temp_path, 'rb') as f:
+        getattr(lesson, field_name).save(upload.filename, File(f), save=False)
+    lesson.save(update_fields=[field_name])
+    os.remove(upload.temp_path)
+    upload.delete()
+    queue_media_processing(lesson)
+
+    return JsonResponse({
+        'offset': received,
+        'size': received,
+        'complete': True,
+        'url': reverse('lesson_video', args=[lesson.course_id, lesson.id, upload.slot]),
+    })
 
 
 # ---------------------- Teacher Views ----------------------
 
 @teacher_required
 def teacher_dashboard(request):
-    courses = Course.objects.filter(teacher=request.user).order_by('-created_at')
+    courses = Course.objects.filter(teacher=request.user).select_related('stats').order_by('-created_at')
     return render(request, 'accounts/teacher_dashboard.html', {'courses': courses})
 
 
+@teacher_required
+def course_progress(request, course_id):
+    """Every enrolled student's progress through one of the teacher's courses."""
+    course = get_object_or_404(Course, id=course_id)
+    if course.teacher_id != request.user.id:
+        return HttpResponseForbidden("Access denied: Not your course.")
+
+    enrollments = with_progress(course.enrollments.select_related('student')).order_by('-completed_count', 'student__username')
+    return render(request, 'courses/course_progress.html', {'course': course, 'enrollments': enrollments})
+
+
 @teacher_required
 def create_course(request):
     if request.method == 'POST':
@@ -130,7 +367,10 @@ def create_lesson(request, course_id):
         if form.is_valid():
             lesson = form.save(commit=False)
             lesson.course = course
+            lesson.order = next_order(course.id)
             lesson.save()
+            if lesson.video_1 or lesson.video_2:
+                queue_media_processing(lesson)
             messages.success(request, 'Lesson added successfully.')
             return redirect('course_detail', course_id=course.id)
     else:
@@ -139,6 +379,54 @@ def create_lesson(request, course_id):
     return render(request, 'courses/create_lesson.html', {'form': form, 'course': course})
 
 
+@teacher_required
+@require_POST
+def reorder_lesson(request, course_id):
+    """Move the ``lesson`` POSTed right after the ``after`` lesson, or to the top when it is empty."""
+    course = get_object_or_404(Course, id=course_id)
+    if course.teacher_id != request.user.id:
+        return HttpResponseForbidden("Access denied: Not your course.")
+
+    lessons = Lesson.objects.filter(course_id=course.id).only('id', 'course_id', 'order')
+    try:
+        lesson = lessons.get(id=int(request.POST.get('lesson', '')))
+        after_id = request.POST.get('after', '')
+        after = lessons.get(id=int(after_id)) if after_id else None
+    except (ValueError, Lesson.DoesNotExist):
+        return JsonResponse({'error': 'No such lesson in this course.'}, status=400)
+    if after is not None and after.id == lesson.id:
+        return JsonResponse({'error': 'A lesson cannot follow itself.'}, status=400)
+
+    order = move_lesson(lesson, after)
+    return JsonResponse({'lesson': lesson.id, 'order': order})
+
+
+@teacher_required
+def import_lessons(request, course_id):
+    """Upload a zip of lessons; the import runs in the background."""
+    course = get_object_or_404(Course, id=course_id)
+    if course.teacher != request.user:
+        return HttpResponseForbidden("Access denied: Not your course.")
+
+    if request.method == 'POST':
+        form = LessonImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            lesson_import = queue_import(course, request.user, form.cleaned_data['archive'])
+            return redirect('lesson_import_status', import_id=lesson_import.id)
+    else:
+        form = LessonImportForm()
+
+    return render(request, 'courses/import_lessons.html', {'form': form, 'course': course})
+
+
+@teacher_required
+def lesson_import_status(request, import_id):
+    lesson_import = get_object_or_404(LessonImport.objects.select_related('course'), id=import_id)
+    if lesson_import.created_by_id != request.user.id:
+        return HttpResponseForbidden("Access denied: Not your import.")
+    return render(request, 'courses/lesson_import_status.html', {'import': lesson_import})
+
+
 @teacher_required
 def create_quiz(request, course_id):
     course = get_object_or_404(Course, id=course_id)
@@ -183,33 +471,48 @@ def add_question(request, quiz_id):
 
 # ---------------------- Student: Attempt Quiz ----------------------
 
+def quiz_access_error(request, quiz):
+    if request.role != 'STUDENT' or not Enrollment.objects.filter(student=request.user, course_id=quiz.course_id).exists():
+        return HttpResponseForbidden("You must be an enrolled student to attempt this quiz.")
+    return None
+
+
 @login_required
 def attempt_quiz(request, quiz_id):
     quiz = get_object_or_404(Quiz, id=quiz_id)
-    course = quiz.course
 
-    if request.user.usertable.role != 'STUDENT' or not Enrollment.objects.filter(student=request.user, course=course).exists():
-        return HttpResponseForbidden("You must be an enrolled student to attempt this quiz.")
-
-    questions = quiz.questions.all()
+    denied = quiz_access_error(request, quiz)
+    if denied:
+        return denied
 
     if request.method == 'POST':
-        correct = 0
-        total = questions.count()
-        for q in questions:
-            key = f"q_{q.id}"
-            selected = request.POST.get(key)
-            if selected == q.correct_option:
-                correct += 1
-
-        score = correct
-        percent = (correct / total * 100) if total else 0
-
+        attempt = grade_attempt(quiz, request.user, request.POST)
         return render(request, 'courses/quiz_result.html', {
             'quiz': quiz,
-            'score': score,
-            'total': total,
-            'percent': percent
+            'attempt': attempt,
+            'score': attempt.score,
+            'total': attempt.total,
+            'percent': attempt.percent
         })
 
-    return render(request, 'courses/attempt_quiz.html', {'quiz': quiz, 'questions': questions})
\ No newline at end of file
+    payload, _ = student_quiz(quiz, request.user.id)
+    return render(request, 'courses/attempt_quiz.html', {'quiz': quiz, 'questions': payload['questions']})
+
+
+@login_required
+@require_http_methods(['GET', 'HEAD'])
+def quiz_questions(request, quiz_id):
+    """The quiz as JSON, in this student's order; answers 304 when the client's copy is current."""
+    quiz = get_object_or_404(Quiz, id=quiz_id)
+    denied = quiz_access_error(request, quiz)
+    if denied:
+        return denied
+
+    payload, etag = student_quiz(quiz, request.user.id)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(dict(payload, submit_url=reverse('attempt_quiz', args=[quiz.id])))
+    response['ETag'] = etag
+    # Personal, and revalidated on every use.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
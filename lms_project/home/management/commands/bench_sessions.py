@@ -0,0 +1,127 @@
+import statistics
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from courses.models import Enrollment, Lesson
+from lms_project.loadtest import percentile
+
+# (SESSION_ENGINE, MESSAGE_STORAGE); 'db/fallback' is Django's default.
+MODES = {
+    'db/session': ('django.contrib.sessions.backends.db', 'django.contrib.messages.storage.session.SessionStorage'),
+    'db/fallback': ('django.contrib.sessions.backends.db', 'django.contrib.messages.storage.fallback.FallbackStorage'),
+    'cached_db/cookie': (
+        'django.contrib.sessions.backends.cached_db', 'django.contrib.messages.storage.cookie.CookieStorage',
+    ),
+}
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class WriteCounter:
+    """Counts the django_session reads and writes, and all writes, of a request."""
+
+    def __init__(self):
+        self.session_reads = self.session_writes = self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        is_write = sql.lstrip().upper().startswith(WRITE_PREFIXES)
+        self.writes += is_write
+        if 'django_session' in sql:
+            if is_write:
+                self.session_writes += 1
+            else:
+                self.session_reads += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the database reads and writes per request of session and message "
+        "storage backends, replaying a student's dashboard visit, 'mark lesson complete' "
+        "POST (which flashes a message) and the redirect that shows it. Uses the "
+        "students created by seed_lms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=50, help="Visit/POST/redirect rounds per student.")
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--prefix', default='seed', help="Username prefix of the students to use.")
+        parser.add_argument('--mode', action='append', choices=MODES, dest='modes',
+                            help="Run only this mode; may be repeated.")
+
+    def handle(self, *args, **options):
+        # The test client sends 'Host: testserver', which only the test runner allows.
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        targets = self.pick_targets(options['users'], options['prefix'])
+        if not targets:
+            raise CommandError("Needs students enrolled in courses with lessons; run seed_lms first.")
+
+        self.stdout.write(
+            f"{'':<18} {'reqs':>6} {'mean':>8} {'p95':>8} {'sess reads':>11} {'sess writes':>12} {'writes':>8}"
+        )
+        for mode in options['modes'] or MODES:
+            session_engine, message_storage = MODES[mode]
+            # Each mode logs in afresh, so its sessions start cold without clearing
+            # the cache, which the site's processes share and which must see the
+            # invalidations of the progress this benchmark writes.
+            with override_settings(SESSION_ENGINE=session_engine, MESSAGE_STORAGE=message_storage):
+                row = self.run(targets, options['rounds'])
+            self.stdout.write(
+                f"{mode:<18} {row['requests']:>6} {row['mean_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                f"{row['session_reads']:>11.2f} {row['session_writes']:>12.2f} {row['writes']:>8.2f}"
+            )
+        self.stdout.write("Reads and writes are per request.")
+
+    def pick_targets(self, count, prefix):
+        """``[(student, complete_lesson URL, lesson URL)]``, one per student."""
+        targets, seen = [], set()
+        enrollments = (
+            Enrollment.objects.filter(student__username__startswith=f'{prefix}_', course__lessons__isnull=False)
+            .select_related('student').order_by('student_id')
+        )
+        for enrollment in enrollments.iterator():
+            if enrollment.student_id in seen:
+                continue
+            seen.add(enrollment.student_id)
+            lesson_id = Lesson.objects.filter(course_id=enrollment.course_id).values_list('id', flat=True).first()
+            args = [enrollment.course_id, lesson_id]
+            targets.append((enrollment.student, reverse('complete_lesson', args=args), reverse('lesson_view', args=args)))
+            if len(targets) >= count:
+                break
+        return targets
+
+    def run(self, targets, rounds):
+        latencies, counters = [], []
+        dashboard = reverse('student_dashboard')
+        for student, complete_url, lesson_url in targets:
+            client = Client()
+            client.force_login(student)
+            for _ in range(rounds):
+                for method, path in (('GET', dashboard), ('POST', complete_url), ('GET', lesson_url)):
+                    counter = WriteCounter()
+                    with ExitStack() as stack:
+                        for alias in connections:
+                            stack.enter_context(connections[alias].execute_wrapper(counter))
+                        start = time.perf_counter()
+                        response = client.post(path) if method == 'POST' else client.get(path)
+                        latencies.append(time.perf_counter() - start)
+                    if response.status_code >= 400:
+                        raise CommandError(f"{method} {path} returned {response.status_code}.")
+                    counters.append(counter)
+
+        ms = [t * 1000 for t in latencies]
+        return {
+            'requests': len(ms),
+            'mean_ms': statistics.fmean(ms),
+            'p95_ms': percentile(ms, 95),
+            'session_reads': statistics.fmean(c.session_reads for c in counters),
+            'session_writes': statistics.fmean(c.session_writes for c in counters),
+            'writes': statistics.fmean(c.writes for c in counters),
+        }
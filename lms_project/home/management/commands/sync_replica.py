@@ -0,0 +1,56 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the default SQLite database to the SQLite read replicas with the "
+        "SQLite backup API, once or every --interval seconds. This stands in for "
+        "real replication when testing the replica router locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', action='append', dest='aliases',
+                            help="Replica alias to copy to; all replicas by default.")
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Keep copying every N seconds (0 copies once).")
+
+    def handle(self, *args, **options):
+        source = settings.DATABASES['default']
+        if source['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("sync_replica only copies SQLite databases.")
+
+        aliases = options['aliases'] or settings.READ_REPLICAS['ALIASES']
+        if not aliases:
+            raise CommandError("No read replicas are configured; set LMS_REPLICA_DB.")
+        for alias in aliases:
+            if alias not in settings.DATABASES or alias == 'default':
+                raise CommandError(f"'{alias}' is not a replica database.")
+            if settings.DATABASES[alias]['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError(f"'{alias}' is not a SQLite database.")
+
+        while True:
+            for alias in aliases:
+                start = time.monotonic()
+                self.copy(source['NAME'], settings.DATABASES[alias]['NAME'])
+                self.stdout.write(f"Copied default to {alias} in {(time.monotonic() - start) * 1000:.0f} ms.")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, source_path, replica_path):
+        # Copy into a temporary file and swap it in, so readers of the replica
+        # see either the old copy or the new one, never a half-written file.
+        temp_path = f'{replica_path}.tmp'
+        src = sqlite3.connect(source_path)
+        dst = sqlite3.connect(temp_path)
+        try:
+            src.backup(dst, pages=4096)
+        finally:
+            dst.close()
+            src.close()
+        os.replace(temp_path, replica_path)
@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'created', 'finished')
+    list_filter = ('status', 'name')
+    readonly_fields = ('created', 'started', 'finished', 'error')
@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from jobs import worker
+from jobs.queue import claim_next, requeue_stale
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs in a pool of worker processes until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--poll', type=float, default=1.0, help="Seconds between polls of an idle queue.")
+        parser.add_argument('--once', action='store_true', help="Exit when the queue has no due jobs left.")
+        parser.add_argument('--stale-after', type=int, default=3600,
+                            help="Requeue jobs that have been running this many seconds when the worker starts.")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale(timedelta(seconds=options['stale_after']))
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs.")
+
+        processes = options['processes']
+        in_flight = {}
+        # Spawned children start with no database connections of ours.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(processes, mp_context=context, initializer=worker.init_process) as pool:
+            self.stdout.write(f"Worker started with {processes} processes.")
+            try:
+                while True:
+                    while len(in_flight) < processes:
+                        job_id = claim_next()
+                        if job_id is None:
+                            break
+                        in_flight[pool.submit(worker.run, job_id)] = job_id
+
+                    if not in_flight:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll'])
+                        continue
+
+                    done, _ = wait(in_flight, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.report(in_flight.pop(future), future)
+            except KeyboardInterrupt:
+                self.stdout.write(f"Stopping; waiting for {len(in_flight)} running jobs.")
+                for future in wait(in_flight).done:
+                    self.report(in_flight.pop(future), future)
+
+    def report(self, job_id, future):
+        try:
+            status = future.result()
+        except Exception as exc:
+            # The job could not even record its outcome; requeue_stale picks it up later.
+            self.stderr.write(f"Job {job_id} crashed: {exc!r}")
+        else:
+            self.stdout.write(f"Job {job_id}: {status}")
@@ -0,0 +1,85 @@
+"""
+A database-backed job queue.
+
+Apps register job functions with ``@task('name')`` in their ``tasks.py``
+and queue work with ``enqueue('name', **payload)``. The payload must be
+JSON-serializable. ``manage.py run_worker`` claims due jobs and runs them
+in a pool of worker processes.
+
+Claiming is an UPDATE guarded by the current status, so several workers
+can poll the same table without running a job twice. A job that raises
+is retried with exponential backoff until ``max_attempts``, then marked
+failed with its traceback.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+RETRY_DELAY = timedelta(seconds=30)
+
+
+def task(name):
+    """Register the decorated function as the job called ``name``."""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, max_attempts=3, **payload):
+    """
+    Queue a job. Call it inside the transaction that makes the change the
+    job works on, so both are committed, or rolled back, together.
+    """
+    if name not in TASKS:
+        raise ValueError(f"No job is registered as {name!r}.")
+    return Job.objects.create(name=name, payload=payload, max_attempts=max_attempts)
+
+
+def claim_next():
+    """Mark the next due job as running and return its id, or None."""
+    now = timezone.now()
+    candidates = Job.objects.filter(status=Job.QUEUED, run_after__lte=now).order_by('run_after', 'id')
+    for job_id in candidates.values_list('id', flat=True)[:10]:
+        claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, started=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return job_id
+    return None
+
+
+def requeue_stale(older_than):
+    """Put back jobs left running by a worker that died; returns how many."""
+    return Job.objects.filter(status=Job.RUNNING, started__lt=timezone.now() - older_than).update(
+        status=Job.QUEUED, run_after=timezone.now(),
+    )
+
+
+def run_job(job_id):
+    """Run a claimed job and record the outcome; returns its new status."""
+    job = Job.objects.get(pk=job_id)
+    try:
+        TASKS[job.name](**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %s:\n%s", job.pk, job.name, job.attempts, error)
+        if job.attempts < job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.QUEUED, run_after=timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1), error=error,
+            )
+            return Job.QUEUED
+        Job.objects.filter(pk=job.pk).update(status=Job.FAILED, error=error, finished=timezone.now())
+        return Job.FAILED
+
+    Job.objects.filter(pk=job.pk).update(status=Job.DONE, error='', finished=timezone.now())
+    return Job.DONE
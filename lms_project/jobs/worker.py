@@ -0,0 +1,21 @@
+"""
+Entry points for the worker processes started by ``run_worker``.
+
+The processes are spawned, not forked, so this module must be importable
+before Django is set up: models are only imported once ``init_process``
+has run.
+"""
+
+import os
+
+import django
+
+
+def init_process():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lms_project.settings')
+    django.setup()
+
+
+def run(job_id):
+    from .queue import run_job
+    return run_job(job_id)
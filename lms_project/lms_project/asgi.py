@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lms_project.settings')
+# Route the dashboards to the async views (see settings.ASYNC_VIEWS).
+os.environ.setdefault('LMS_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,49 @@
+"""
+Conditional GET for pages built from a few timestamps.
+
+A view passes the ``updated_at`` values its page is built from (and any
+per-user state it shows); if the client's ``If-None-Match`` or
+``If-Modified-Since`` still matches, it gets a 304 and the template is
+never rendered.
+
+Pages are personal (navigation, role, enrollment), so the ETag includes
+the user and role, and responses are ``private`` and revalidated on every
+use. It also includes the CSRF secret: the forms on a page carry a token
+for it, and logging in rotates it. Pages with pending flash messages are
+never validated: a 304 would hide the message, which ``base.html``
+renders (and so consumes) on the page after it was queued.
+"""
+
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def page_etag(request, *parts):
+    csrf_secret = request.META.get('CSRF_COOKIE')
+    key = repr((request.user.pk, getattr(request, 'role', None), csrf_secret, *parts))
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def conditional_render(request, template_name, get_context, *, last_modified, etag_parts=()):
+    """
+    ``render()`` for safe requests, answering 304 when the client's copy is
+    current. ``get_context`` is only called when the page is rendered;
+    ``last_modified`` is a datetime or None.
+    """
+    if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+        return render(request, template_name, get_context())
+
+    etag = page_etag(request, last_modified, *etag_parts)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = render(request, template_name, get_context())
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,78 @@
+"""
+Read/write splitting between ``default`` and the read replicas in
+``settings.READ_REPLICAS['ALIASES']``.
+
+Writes always go to ``default``. Reads go to a replica only while
+``ReplicaRoutingMiddleware`` has marked the current request as
+replica-safe: a GET or HEAD to one of the ``READ_REPLICAS['VIEWS']``
+from a client that has not just written something (see
+``STICKY_COOKIE``; the router notes the writes of each request, so
+a GET that writes counts too). Everything else, including every read
+outside a request, stays on ``default``.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_use_replica = ContextVar('use_replica', default=False)
+# A mutable record, so writes made in a copied context (sync_to_async) still land in it.
+_writes = ContextVar('writes', default=None)
+
+# Session rows are written by the same request that reads them next.
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+def replica_aliases():
+    return settings.READ_REPLICAS.get('ALIASES', ())
+
+
+def use_replica(enabled):
+    """Route this context's reads to a replica (True) or to ``default`` (False)."""
+    _use_replica.set(enabled and bool(replica_aliases()))
+
+
+def watch_writes():
+    """Start noting whether this context writes; ``wrote()`` reads the note."""
+    _writes.set({'wrote': False})
+
+
+def wrote():
+    record = _writes.get()
+    return bool(record and record['wrote'])
+
+
+@contextmanager
+def read_from_primary():
+    """
+    Read from ``default`` inside the block, for results that outlive the
+    request (e.g. cached fragments) and must not be behind the primary.
+    """
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            return random.choice(replica_aliases())
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        record = _writes.get()
+        if record is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            record['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as default.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of default and get its schema from replication.
+        return db not in replica_aliases()
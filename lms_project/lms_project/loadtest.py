@@ -0,0 +1,46 @@
+"""
+Helpers shared by the benchmark management commands: latency summaries
+and the table they are printed as.
+"""
+
+import statistics
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed, queries=None):
+    """
+    Summarize request latencies (in seconds) measured over ``elapsed``
+    seconds of wall time. ``queries`` holds the query count of each request,
+    when it is known.
+    """
+    ms = [t * 1000 for t in latencies]
+    summary = {
+        'requests': len(ms),
+        'throughput': len(ms) / elapsed if elapsed else 0.0,
+        'mean_ms': statistics.fmean(ms) if ms else 0.0,
+        'p50_ms': percentile(ms, 50) if ms else 0.0,
+        'p95_ms': percentile(ms, 95) if ms else 0.0,
+        'p99_ms': percentile(ms, 99) if ms else 0.0,
+    }
+    if queries is not None:
+        summary['queries_per_request'] = statistics.fmean(queries) if queries else 0.0
+    return summary
+
+
+def format_table(rows):
+    """Lines of a table of ``(name, summary)`` rows."""
+    lines = [f"{'':<20} {'reqs':>6} {'req/s':>8} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}"]
+    for name, row in rows:
+        queries = row.get('queries_per_request')
+        lines.append(
+            f"{name:<20} {row['requests']:>6} {row['throughput']:>8.1f} {row['mean_ms']:>8.2f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+            f"{'-' if queries is None else f'{queries:.1f}':>8}"
+        )
+    return lines
@@ -0,0 +1,290 @@
+import logging
+import mimetypes
+import os
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotFound, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import db_router
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+# Collapse literals and IN (...) lists so queries that differ only in
+# their parameters share one "shape".
+_IN_LIST = re.compile(r'IN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def query_shape(sql):
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _LITERAL.sub('?', sql)
+
+
+class QueryStats:
+    """Collects every query run through a connection's execute wrapper."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+    def repeated(self, threshold):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the queries and DB time of every request to a watched view and
+    report when it goes over ``settings.SQL_BUDGET``. Query shapes repeated
+    ``N_PLUS_ONE_THRESHOLD`` times or more are reported as likely N+1s.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = settings.SQL_BUDGET
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.config.get('ENABLED'):
+            return self.get_response(request)
+
+        stats = QueryStats()
+        with ExitStack() as stack:
+            self.wrap_connections(stack, stats)
+            response = self.get_response(request)
+
+        self.finish(request, stats)
+        return response
+
+    async def __acall__(self, request):
+        if not self.config.get('ENABLED'):
+            return await self.get_response(request)
+
+        # The async ORM runs queries on the request's thread-sensitive worker
+        # thread, so the wrappers have to be installed on that thread's connections.
+        stats = QueryStats()
+        stack = ExitStack()
+        await sync_to_async(self.wrap_connections)(stack, stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+
+        self.finish(request, stats)
+        return response
+
+    def wrap_connections(self, stack, stats):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(stats))
+
+    def finish(self, request, stats):
+        view_name = getattr(request, '_budget_view_name', None)
+        if view_name:
+            self.check_budget(request, view_name, stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        module = getattr(view_func, '__module__', '')
+        if module.startswith(tuple(self.config.get('VIEW_MODULES', ()))):
+            request._budget_view_name = f"{module}.{getattr(view_func, '__name__', view_func)}"
+
+    def check_budget(self, request, view_name, stats):
+        problems = []
+        max_queries = self.config.get('MAX_QUERIES')
+        max_time_ms = self.config.get('MAX_DB_TIME_MS')
+        db_time_ms = stats.duration * 1000
+
+        if max_queries is not None and stats.count > max_queries:
+            problems.append(f"{stats.count} queries (budget {max_queries})")
+        if max_time_ms is not None and db_time_ms > max_time_ms:
+            problems.append(f"{db_time_ms:.1f} ms in the database (budget {max_time_ms} ms)")
+        for shape, n in stats.repeated(self.config.get('N_PLUS_ONE_THRESHOLD', 5)):
+            problems.append(f"possible N+1, {n}x: {shape}")
+
+        if not problems:
+            return
+
+        message = f"SQL budget exceeded by {view_name} ({request.method} {request.path}): " + "; ".join(problems)
+        if self.config.get('RAISE'):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Send the reads of safe requests to the views in ``READ_REPLICAS['VIEWS']``
+    to a read replica (see ``db_router``).
+
+    A request that wrote something (some GET views write too) or that is
+    not safe gets ``STICKY_COOKIE`` on its response, and the client's next
+    ``STICKY_SECONDS`` of requests read from ``default``, where their own
+    writes already are.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = settings.READ_REPLICAS
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        db_router.use_replica(False)
+        db_router.watch_writes()
+        try:
+            response = self.get_response(request)
+        finally:
+            db_router.use_replica(False)
+        return self.mark_sticky(request, response)
+
+    async def __acall__(self, request):
+        db_router.use_replica(False)
+        db_router.watch_writes()
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_router.use_replica(False)
+        return self.mark_sticky(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        db_router.use_replica(
+            request.method in self.SAFE_METHODS
+            and request.resolver_match.url_name in self.config.get('VIEWS', ())
+            and self.config['STICKY_COOKIE'] not in request.COOKIES
+        )
+
+    def mark_sticky(self, request, response):
+        wrote = db_router.wrote() or request.method not in self.SAFE_METHODS
+        if wrote and db_router.replica_aliases():
+            response.set_cookie(
+                self.config['STICKY_COOKIE'], '1',
+                max_age=self.config['STICKY_SECONDS'], httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class StaticAssetMiddleware:
+    """
+    Serve the files ``collectstatic`` put in ``STATIC_ROOT`` when ``DEBUG``
+    is off (runserver serves them itself otherwise).
+
+    The ``.br`` or ``.gz`` variant written by
+    ``storage.CompressedManifestStaticFilesStorage`` is sent when the
+    client accepts it. Hashed file names never change content, so they are
+    cached for a year as ``immutable``; plain names only briefly.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+    SHORT = 'public, max-age=300'
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_ROOT or not settings.STATIC_URL.startswith('/'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = str(settings.STATIC_ROOT)
+        self._hashed_names = None
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if self.is_static(request):
+            return self.serve(request, request.path[len(self.prefix):])
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.is_static(request):
+            return await sync_to_async(self.serve, thread_sensitive=False)(request, request.path[len(self.prefix):])
+        return await self.get_response(request)
+
+    def is_static(self, request):
+        return request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix)
+
+    @property
+    def hashed_names(self):
+        if self._hashed_names is None:
+            # Manifest storages map each name to its hashed name; others hash nothing.
+            self._hashed_names = frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        return self._hashed_names
+
+    def accepted_encodings(self, request):
+        accepted = set()
+        for part in request.headers.get('Accept-Encoding', '').split(','):
+            coding, _, params = part.partition(';')
+            if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                accepted.add(coding.strip().lower())
+        return accepted
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return HttpResponseNotFound()
+        if not os.path.isfile(path):
+            return HttpResponseNotFound()
+
+        cache_control = self.IMMUTABLE if name in self.hashed_names else self.SHORT
+        mtime = os.stat(path).st_mtime
+        if not was_modified_since(request.headers.get('If-Modified-Since'), mtime):
+            response = HttpResponseNotModified()
+        else:
+            send_path, encoding = path, None
+            accepted = self.accepted_encodings(request)
+            for coding, suffix in self.ENCODINGS:
+                if coding in accepted and os.path.isfile(path + suffix):
+                    send_path, encoding = path + suffix, coding
+                    break
+            content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            response = FileResponse(open(send_path, 'rb'), content_type=content_type)
+            if encoding:
+                response['Content-Encoding'] = encoding
+
+        response['Last-Modified'] = http_date(mtime)
+        response['Cache-Control'] = cache_control
+        response['Vary'] = 'Accept-Encoding'
+        return response
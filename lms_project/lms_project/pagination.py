@@ -0,0 +1,80 @@
+"""
+Keyset (cursor) pagination shared by the catalog and list views.
+
+Unlike OFFSET pagination, each page is fetched with a ``WHERE`` on the
+ordering columns of the last row already shown, so the cost of a page is
+the same whether it is the first one or the thousandth.
+"""
+
+import base64
+import json
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` by ``ordering``, which must end with a unique
+    column (usually ``-id``) so every row has a distinct position.
+    """
+
+    def __init__(self, queryset, ordering, page_size):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.page_size = page_size
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, name) for name in self.fields]
+        payload = json.dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in values])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if len(values) != len(self.fields):
+                raise ValueError
+            model = self.queryset.model
+            return [model._meta.get_field(name).to_python(value) for name, value in zip(self.fields, values)]
+        except Exception:
+            raise InvalidCursor(cursor)
+
+    def _after(self, values):
+        # (a, b) after (x, y)  ==  a > x  OR  (a = x AND b > y), with the
+        # comparison flipped for descending columns.
+        condition = Q()
+        for i, name in enumerate(self.ordering):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            term = Q(**{f'{field}__{lookup}': values[i]})
+            for prev_field, prev_value in zip(self.fields[:i], values[:i]):
+                term &= Q(**{prev_field: prev_value})
+            condition |= term
+        return condition
+
+    def _page_queryset(self, cursor):
+        queryset = self.queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+        # One extra row tells whether another page exists without a COUNT(*).
+        return queryset[:self.page_size + 1]
+
+    def _split(self, items):
+        next_cursor = None
+        if len(items) > self.page_size:
+            items = items[:self.page_size]
+            next_cursor = self.encode_cursor(items[-1])
+        return items, next_cursor
+
+    def page(self, cursor=None):
+        """Return ``(items, next_cursor)``; ``next_cursor`` is None on the last page."""
+        return self._split(list(self._page_queryset(cursor)))
+
+    async def apage(self, cursor=None):
+        """Async version of ``page()``, using the async ORM."""
+        return self._split([obj async for obj in self._page_queryset(cursor)])
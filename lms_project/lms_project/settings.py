@@ -4,6 +4,9 @@ Django settings for lms_project project.
 Generated by 'django-admin startproject' using Django 5.2.7.
 """
 
+import os
+import sys
+import tempfile
 from pathlib import Path
 
 # ----------------------------
@@ -19,6 +22,9 @@ SECRET_KEY = 'django-insecure-n+jtl&^3pyr4^zrs4f1=v)dp7p2rk92ad2kar#7gc^agw)-8s^
 DEBUG = True
 ALLOWED_HOSTS = []  # Add your domain or IP in production
 
+# Running under `manage.py test`.
+TESTING = sys.argv[1:2] == ['test']
+
 
 # ----------------------------
 # APPLICATION DEFINITION
@@ -37,14 +43,20 @@ INSTALLED_APPS = [
     'accounts',
     'courses',
     'queries',
+    'search',
+    'jobs',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'lms_project.middleware.StaticAssetMiddleware',
+    'lms_project.middleware.QueryBudgetMiddleware',
+    'lms_project.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.UserRoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,6 +73,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'accounts.context_processors.user_role',
             ],
         },
     },
@@ -68,6 +81,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'lms_project.wsgi.application'
 
+# Serve the dashboards from courses.async_views. asgi.py turns this on;
+# under WSGI each async view would need a thread hop, so the sync ones stay.
+ASYNC_VIEWS = os.environ.get('LMS_ASYNC_VIEWS') == '1'
+
 
 # ----------------------------
 # DATABASE CONFIGURATION
@@ -79,6 +96,117 @@ DATABASES = {
     }
 }
 
+# A local read replica: set LMS_REPLICA_DB to a file path and keep it in
+# sync with `manage.py sync_replica --interval 5`.
+if os.environ.get('LMS_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['LMS_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+elif TESTING:
+    # The test runner points this at default's test database, so the routing
+    # tests have a replica to read from (see READ_REPLICAS below).
+    DATABASES['replica'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': '', 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['lms_project.db_router.ReplicaRouter']
+
+
+# ----------------------------
+# CACHE, SESSIONS & MESSAGES
+# ----------------------------
+# LMS_CACHE_URL picks the cache behind sessions, roles, answer keys, quiz
+# payloads and the page caches. Signals invalidate those entries in the
+# cache of the process that made the change, so every server and worker
+# process must share one cache:
+#   file://<tempdir>/lms_cache  shared by the processes of one machine (the default)
+#   memcached://127.0.0.1:11211 needs pymemcache
+#   redis://127.0.0.1:6379/1    needs redis
+#   locmem://                   per process: only for a single process, e.g. runserver alone
+CACHE_URL = os.environ.get('LMS_CACHE_URL', 'file://' + os.path.join(tempfile.gettempdir(), 'lms_cache'))
+_cache_scheme, _, _cache_location = CACHE_URL.partition('://')
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[_cache_scheme],
+        'LOCATION': CACHE_URL if _cache_scheme == 'redis' else _cache_location or 'lms',
+        'KEY_PREFIX': 'lms',
+        # Room for sessions next to the fragments; locmem and file caches cull past this.
+        'OPTIONS': {'MAX_ENTRIES': 20000} if _cache_scheme in ('locmem', 'file') else {},
+    },
+}
+
+# Sessions are read from the cache and only fall back to django_session on
+# a miss; messages travel in a cookie, so flashing one writes no session.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
+# ----------------------------
+# LIVE QUERY UPDATES
+# ----------------------------
+# Events reach only the streams of the process that published them unless
+# BROKER_URL points every process at the same Redis (redis://...).
+# Streams need ASGI (asgi.py sets ASYNC_VIEWS); under WSGI the pages don't
+# open one and the endpoint answers 204.
+QUERY_EVENTS = {
+    'BROKER_URL': os.environ.get('LMS_EVENTS_URL', ''),
+    'KEEPALIVE_SECONDS': 20,
+    'RETRY_MS': 3000,
+}
+
+
+# ----------------------------
+# READ REPLICAS
+# ----------------------------
+# Safe requests to VIEWS (URL names) read from one of ALIASES. After any
+# other request, or any request that wrote, the client reads from default
+# for STICKY_SECONDS, which should cover the replication lag. Tests read
+# from default only (TestCase data is not visible on another connection)
+# unless they set ALIASES themselves.
+READ_REPLICAS = {
+    'ALIASES': [] if TESTING else [alias for alias in DATABASES if alias != 'default'],
+    'VIEWS': (
+        'course_list', 'course_catalog', 'course_detail', 'lesson_view',
+        'student_dashboard', 'teacher_dashboard', 'my_courses',
+    ),
+    'STICKY_COOKIE': 'replica_sticky',
+    'STICKY_SECONDS': 15,
+}
+
+
+# ----------------------------
+# SQL BUDGET (per request)
+# ----------------------------
+# Views in these modules that go over budget, or repeat one query shape
+# N_PLUS_ONE_THRESHOLD times, are logged; set RAISE to fail the request.
+SQL_BUDGET = {
+    'ENABLED': DEBUG,
+    'RAISE': False,
+    'VIEW_MODULES': ('courses.views', 'courses.async_views', 'queries.views', 'accounts.views'),
+    'MAX_QUERIES': 15,
+    'MAX_DB_TIME_MS': 100,
+    'N_PLUS_ONE_THRESHOLD': 5,
+}
+
+
+# ----------------------------
+# LOGIN THROTTLE
+# ----------------------------
+# Failed logins allowed per client IP and per username within a sliding
+# WINDOW_SECONDS, counted in the cache; past either, logins get a 429.
+LOGIN_THROTTLE = {
+    'ENABLED': True,
+    'WINDOW_SECONDS': 15 * 60,
+    'MAX_FAILURES_PER_IP': 30,
+    'MAX_FAILURES_PER_USERNAME': 5,
+}
+
 
 # ----------------------------
 # PASSWORD VALIDATORS
@@ -113,10 +241,31 @@ USE_TZ = True
 # ----------------------------
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Outside DEBUG, collectstatic also writes content-hashed copies (listed in
+# staticfiles.json) and .gz/.br variants, which StaticAssetMiddleware serves
+# with far-future cache headers. Brotli variants need the 'brotli' package.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'lms_project.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Lesson videos are streamed by courses.views.lesson_video. Set SENDFILE_HEADER
+# to 'X-Accel-Redirect' (nginx, with an internal location at SENDFILE_URL_PREFIX
+# aliased to MEDIA_ROOT) or 'X-Sendfile' (Apache) to let the web server send them.
+SENDFILE_HEADER = None
+SENDFILE_URL_PREFIX = '/protected-media/'
+VIDEO_UPLOAD_MAX_SIZE = 4 * 1024 ** 3  # 4 GB
+
 
 # ----------------------------
 # DEFAULT PRIMARY KEY TYPE
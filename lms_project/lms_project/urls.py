@@ -16,8 +16,6 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path,include
-from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,9 +23,10 @@ urlpatterns = [
     path('',include('accounts.urls')),
     path('courses/', include('courses.urls')),
     path('queries/', include('queries.urls')),
+    path('search/', include('search.urls')),
 
 ]
 
-# Serve media files during development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# MEDIA_ROOT is not served as-is: lesson videos and their posters go through
+# courses.views.lesson_video and lesson_video_poster, which check access,
+# and the upload and import files there are never public.
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Live query updates, pushed to browsers with server-sent events.
+
+Saving a reply or changing a query's status publishes an event (see
+``signals.py``) to the broker; every open ``query_events`` stream is
+subscribed to it and forwards the events its user may see. An idle
+stream is one open connection waiting on a queue: it runs no queries.
+
+The default broker only reaches streams served by the same process. With
+several server processes, set ``QUERY_EVENTS['BROKER_URL']`` to a Redis
+URL (needs the ``redis`` package) so every process receives every event.
+"""
+
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.utils import dateformat, timezone
+
+# Events waiting for a slow client beyond this are dropped; it reloads to catch up.
+MAX_PENDING = 100
+REDIS_CHANNEL = 'lms:query-events'
+
+
+def _deliver(queue, event):
+    if queue.qsize() < MAX_PENDING:
+        queue.put_nowait(event)
+
+
+class InProcessBroker:
+    """Fans events out to the subscribers of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def publish(self, event):
+        # Called from request and worker threads; each queue belongs to its stream's event loop.
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_deliver, queue, event)
+            except RuntimeError:  # the loop has closed; its stream is gone
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self):
+        """An ``asyncio.Queue`` receiving every event published while open."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+
+class RedisBroker:
+    """Sends events through Redis pub/sub, so they reach the streams of every process."""
+
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, event):
+        self._client.publish(REDIS_CHANNEL, json.dumps(event))
+
+    @asynccontextmanager
+    async def subscribe(self):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(REDIS_CHANNEL)
+        queue = asyncio.Queue()
+
+        async def pump():
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    _deliver(queue, json.loads(message['data']))
+
+        task = asyncio.create_task(pump())
+        try:
+            yield queue
+        finally:
+            task.cancel()
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            url = settings.QUERY_EVENTS.get('BROKER_URL')
+            _broker = RedisBroker(url) if url else InProcessBroker()
+    return _broker
+
+
+# ---------------------- Events ----------------------
+
+def _audience(query, previous_status=None):
+    return {
+        'created_by_id': query.created_by_id,
+        'assigned_to_id': query.assigned_to_id,
+        'statuses': [s for s in (query.status, previous_status) if s],
+    }
+
+
+def reply_event(message):
+    created = timezone.localtime(message.created)
+    return {
+        'type': 'reply',
+        'audience': _audience(message.query),
+        'data': {
+            'query_id': message.query_id,
+            'id': message.id,
+            'author': message.author.username if message.author_id else '',
+            'from_staff': message.from_staff,
+            'body': message.body,
+            'created': dateformat.format(created, 'M d, Y H:i'),
+        },
+    }
+
+
+def status_event(query, previous_status):
+    return {
+        'type': 'status',
+        'audience': _audience(query, previous_status),
+        'data': {'query_id': query.id, 'status': query.status, 'previous_status': previous_status},
+    }
+
+
+def created_event(query):
+    return {
+        'type': 'created',
+        'audience': _audience(query),
+        'data': {'query_id': query.id, 'title': query.title, 'course_id': query.course_id, 'status': query.status},
+    }
+
+
+def can_see(event, user_id, role, query_id=None):
+    """Whether the user may see the event; the same rules as ``query_list`` and ``query_detail``."""
+    audience = event['audience']
+    if query_id is not None:
+        if event['data']['query_id'] != query_id:
+            return False
+        return role != 'STUDENT' or audience['created_by_id'] == user_id
+    if role == 'STUDENT':
+        return audience['created_by_id'] == user_id
+    if role in ('TEACHER', 'TA'):
+        return audience['assigned_to_id'] == user_id or 'Open' in audience['statuses']
+    return True
+
+
+def format_event(event, event_id):
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_progress_counters'),
+        ('queries', '0002_alter_query_assigned_to_alter_query_course_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='query',
+            index=models.Index(fields=['status', '-created'], name='query_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='query',
+            index=models.Index(fields=['assigned_to', 'status'], name='query_assignee_status_idx'),
+        ),
+    ]
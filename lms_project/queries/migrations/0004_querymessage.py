@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queries', '0003_query_queue_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_staff', models.BooleanField(default=False)),
+                ('body', models.TextField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='query_messages', to=settings.AUTH_USER_MODEL)),
+                ('query', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='queries.query')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['query', 'id'], name='querymessage_thread_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+STUDENT_REPLY_SEPARATOR = "\n\n[Student Reply]: "
+
+
+def split_response(response):
+    """
+    Split an old Query.response into ``(staff_text, student_replies)``,
+    stripped, leaving out empty parts. A reply that itself contained the
+    separator can't be told apart from two replies, and becomes two.
+    """
+    staff_text, *student_replies = response.split(STUDENT_REPLY_SEPARATOR)
+    return staff_text.strip(), [reply.strip() for reply in student_replies if reply.strip()]
+
+
+def split_responses(apps, schema_editor):
+    """Turn each Query.response into thread messages: the staff text, then every student reply."""
+    Query = apps.get_model('queries', 'Query')
+    QueryMessage = apps.get_model('queries', 'QueryMessage')
+
+    batch = []
+    queries = Query.objects.exclude(response__isnull=True).exclude(response="")
+    for query in queries.only('id', 'response', 'assigned_to_id', 'created_by_id').iterator():
+        staff_text, student_replies = split_response(query.response)
+        if staff_text:
+            batch.append(QueryMessage(query_id=query.id, author_id=query.assigned_to_id, from_staff=True, body=staff_text))
+        for reply in student_replies:
+            batch.append(QueryMessage(query_id=query.id, author_id=query.created_by_id, from_staff=False, body=reply))
+        if len(batch) >= 1000:
+            QueryMessage.objects.bulk_create(batch)
+            batch = []
+    QueryMessage.objects.bulk_create(batch)
+
+    # The old text had no timestamps; date the migrated messages with their query.
+    QueryMessage.objects.update(
+        created=Subquery(Query.objects.filter(pk=OuterRef('query_id')).values('created')[:1])
+    )
+
+
+def join_responses(apps, schema_editor):
+    Query = apps.get_model('queries', 'Query')
+    QueryMessage = apps.get_model('queries', 'QueryMessage')
+
+    for query in Query.objects.filter(messages__isnull=False).distinct().only('id'):
+        parts = []
+        for message in QueryMessage.objects.filter(query_id=query.id).order_by('id'):
+            parts.append(message.body if message.from_staff else STUDENT_REPLY_SEPARATOR + message.body)
+        Query.objects.filter(pk=query.id).update(response="".join(parts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queries', '0004_querymessage'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_responses, join_responses),
+    ]
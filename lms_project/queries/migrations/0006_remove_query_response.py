@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queries', '0005_split_query_responses'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='query',
+            name='response',
+        ),
+    ]
@@ -15,9 +15,41 @@ class Query(models.Model):
     lesson = models.ForeignKey(Lesson, on_delete=models.SET_NULL, null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="student_queries")
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="assigned_queries")
-    response = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Open")
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # The work queue: filter by status, newest first.
+            models.Index(fields=["status", "-created"], name="query_status_created_idx"),
+            # "Assigned to me", optionally by status.
+            models.Index(fields=["assigned_to", "status"], name="query_assignee_status_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The status as loaded, so a save can tell whether it changed (see signals.py).
+        if "status" in field_names:
+            instance._loaded_status = instance.status
+        return instance
+
+    def __str__(self):
+        return f"{self.title} ({self.status})"
+
+
+class QueryMessage(models.Model):
+    """One reply in a query's thread. Rows are only ever appended."""
+    query = models.ForeignKey(Query, on_delete=models.CASCADE, related_name="messages")
+    author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="query_messages")
+    from_staff = models.BooleanField(default=False)
+    body = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["query", "id"], name="querymessage_thread_idx"),
+        ]
+
     def __str__(self):
-        return f"{self.title} ({self.status})"
\ No newline at end of file
+        return f"{self.query_id}: {self.body[:40]}"
@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from courses import stats
+from . import events
+from .models import Query, QueryMessage
+
+
+def publish_on_commit(event):
+    # robust: a broker outage is logged instead of failing the request that already committed.
+    transaction.on_commit(lambda: events.get_broker().publish(event), robust=True)
+
+
+@receiver(post_save, sender=Query)
+def query_saved(sender, instance, created, **kwargs):
+    """Keep ``CourseStats.open_query_count`` in step with status changes, and publish them."""
+    previous_status = getattr(instance, "_loaded_status", None)
+    if created:
+        publish_on_commit(events.created_event(instance))
+    elif previous_status is not None and previous_status != instance.status:
+        publish_on_commit(events.status_event(instance, previous_status))
+
+    was_open = not created and getattr(instance, "_loaded_status", None) == "Open"
+    is_open = instance.status == "Open"
+    if is_open != was_open and (created or hasattr(instance, "_loaded_status")):
+        stats.adjust(instance.course_id, open_query_count=1 if is_open else -1)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Query)
+def query_deleted(sender, instance, origin=None, **kwargs):
+    if stats.deleting_course(origin):
+        return
+    if getattr(instance, "_loaded_status", instance.status) == "Open":
+        stats.adjust(instance.course_id, rebuild_missing=False, open_query_count=-1)
+
+
+@receiver(post_save, sender=QueryMessage)
+def query_message_saved(sender, instance, created, **kwargs):
+    if created:
+        publish_on_commit(events.reply_event(instance))
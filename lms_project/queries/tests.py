@@ -1,3 +1,76 @@
-from django.test import TestCase
+from importlib import import_module
 
-# Create your tests here.
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TransactionTestCase
+
+split_migration = import_module("queries.migrations.0005_split_query_responses")
+split_response = split_migration.split_response
+SEPARATOR = split_migration.STUDENT_REPLY_SEPARATOR
+
+
+class SplitResponseTests(SimpleTestCase):
+    def test_staff_text_then_replies(self):
+        response = f"Read chapter 2.{SEPARATOR}Which part?{SEPARATOR}  Found it, thanks.\n"
+        self.assertEqual(split_response(response), ("Read chapter 2.", ["Which part?", "Found it, thanks."]))
+
+    def test_legacy_text_without_replies(self):
+        self.assertEqual(split_response("  See the notes.\n\nAnd the video. "), ("See the notes.\n\nAnd the video.", []))
+
+    def test_replies_without_staff_text(self):
+        self.assertEqual(split_response(f"{SEPARATOR}Hello?"), ("", ["Hello?"]))
+
+    def test_reply_containing_the_separator(self):
+        # Indistinguishable from two replies; the words are all kept.
+        response = f"Answer.{SEPARATOR}I typed{SEPARATOR}myself"
+        self.assertEqual(split_response(response), ("Answer.", ["I typed", "myself"]))
+
+    def test_empty_replies_are_dropped(self):
+        self.assertEqual(split_response(f"Answer.{SEPARATOR}   {SEPARATOR}ok"), ("Answer.", ["ok"]))
+
+
+class SplitResponsesMigrationTests(TransactionTestCase):
+    before = [("queries", "0004_querymessage")]
+    after = [("queries", "0005_split_query_responses")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_responses_become_messages_and_back(self):
+        apps = self.migrate(self.before)
+        User = apps.get_model("auth", "User")
+        Course = apps.get_model("courses", "Course")
+        Query = apps.get_model("queries", "Query")
+        teacher = User.objects.create(username="teacher")
+        student = User.objects.create(username="student")
+        course = Course.objects.create(title="Course", description="", teacher=teacher)
+        threaded = Query.objects.create(
+            title="Q1", description="", course=course, created_by=student, assigned_to=teacher,
+            response=f"Read chapter 2.{SEPARATOR}Which part?",
+        )
+        legacy = Query.objects.create(
+            title="Q2", description="", course=course, created_by=student, response="Done.",
+        )
+        Query.objects.create(title="Q3", description="", course=course, created_by=student, response="")
+
+        apps = self.migrate(self.after)
+        QueryMessage = apps.get_model("queries", "QueryMessage")
+        self.assertEqual(
+            list(QueryMessage.objects.order_by("id").values_list("query_id", "author_id", "from_staff", "body")),
+            [
+                (threaded.id, teacher.id, True, "Read chapter 2."),
+                (threaded.id, student.id, False, "Which part?"),
+                (legacy.id, None, True, "Done."),
+            ],
+        )
+
+        apps = self.migrate(self.before)
+        Query = apps.get_model("queries", "Query")
+        self.assertEqual(Query.objects.get(pk=threaded.id).response, f"Read chapter 2.{SEPARATOR}Which part?")
+        self.assertEqual(Query.objects.get(pk=legacy.id).response, "Done.")
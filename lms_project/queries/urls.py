@@ -5,4 +5,5 @@ urlpatterns = [
     path("", views.query_list, name="query_list"),
     path("new/", views.query_create, name="query_create"),
     path("<int:query_id>/", views.query_detail, name="query_detail"),
+    path("events/", views.query_events, name="query_events"),
 ]
\ No newline at end of file
@@ -1,32 +1,80 @@
+import asyncio
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import Query
+from django.db.models import Count, Q
+from django.http import HttpResponse, StreamingHttpResponse
+from lms_project.pagination import KeysetPaginator, InvalidCursor
+from . import events
+from .models import Query, QueryMessage
 from .forms import QueryForm
 
+QUEUE_PAGE_SIZE = 25
+THREAD_PAGE_SIZE = 20
+
+# (status, key used for its count in the aggregate query)
+STATUS_COUNT_KEYS = [(code, code.lower().replace(" ", "_")) for code, _ in Query.STATUS_CHOICES]
+
 # -----------------------------
 # STUDENT VIEWS
 # -----------------------------
 @login_required
 def query_list(request):
-    """List all queries visible to the current user."""
+    """The query queue visible to the current user, newest first, filterable by status and course."""
     user = request.user
-    role = user.usertable.role
+    role = request.role
 
     if role == "STUDENT":
         queries = Query.objects.filter(created_by=user)
     elif role in ["TEACHER", "TA"]:
-        queries = Query.objects.filter(assigned_to=user) | Query.objects.filter(status="Open")
+        queries = Query.objects.filter(Q(assigned_to=user) | Q(status="Open"))
     else:
         queries = Query.objects.all()
 
-    return render(request, "queries/query_list.html", {"queries": queries})
+    course_id = request.GET.get("course", "")
+    if course_id.isdigit():
+        queries = queries.filter(course_id=course_id)
+    else:
+        course_id = ""
+
+    # Counts per status for the tabs, in one aggregate query.
+    counts = queries.aggregate(**{
+        key: Count("id", filter=Q(status=code)) for code, key in STATUS_COUNT_KEYS
+    })
+    status_tabs = [(code, counts[key]) for code, key in STATUS_COUNT_KEYS]
+
+    status = request.GET.get("status", "")
+    if status in dict(Query.STATUS_CHOICES):
+        queries = queries.filter(status=status)
+    else:
+        status = ""
+
+    queries = queries.select_related("course").only(
+        "id", "title", "status", "created", "course_id", "course__title"
+    )
+    paginator = KeysetPaginator(queries, ("-created", "-id"), QUEUE_PAGE_SIZE)
+    try:
+        page, next_cursor = paginator.page(request.GET.get("cursor"))
+    except InvalidCursor:
+        page, next_cursor = paginator.page()
+
+    return render(request, "queries/query_list.html", {
+        "queries": page,
+        "next_cursor": next_cursor,
+        "status": status,
+        "status_tabs": status_tabs,
+        "total": sum(count for _, count in status_tabs),
+        "course_id": course_id,
+        "live_updates": settings.ASYNC_VIEWS,
+    })
 
 
 @login_required
 def query_create(request):
     """Allow students to create a new query."""
-    if request.user.usertable.role != "STUDENT":
+    if request.role != "STUDENT":
         messages.error(request, "Only students can create queries.")
         return redirect("query_list")
 
@@ -48,31 +96,93 @@ def query_create(request):
 @login_required
 def query_detail(request, query_id):
     """View and interact with a single query."""
-    query = get_object_or_404(Query, id=query_id)
+    query = get_object_or_404(Query.objects.select_related("course", "lesson"), id=query_id)
 
     if request.method == "POST":
-        # TEACHER/TA updates response
-        if request.user.usertable.role in ["TEACHER", "TA"]:
-            query.response = request.POST.get("response")
-            query.status = request.POST.get("status")
-            query.save()
+        # TEACHER/TA replies and/or changes the status
+        if request.role in ["TEACHER", "TA"]:
+            reply = request.POST.get("response", "").strip()
+            status = request.POST.get("status")
+            if reply:
+                QueryMessage.objects.create(query=query, author=request.user, from_staff=True, body=reply)
+            if status in dict(Query.STATUS_CHOICES) and status != query.status:
+                query.status = status
+                query.save(update_fields=["status"])
             messages.success(request, "Response updated successfully.")
 
         # STUDENT replies or resolves
-        elif request.user.usertable.role == "STUDENT":
+        elif request.role == "STUDENT":
             action = request.POST.get("action")
-            student_reply = request.POST.get("student_reply")
+            student_reply = request.POST.get("student_reply", "").strip()
 
             if action == "reply" and student_reply:
-                query.response = (query.response or "") + f"\n\n[Student Reply]: {student_reply}"
-                query.status = "In Progress"
-                query.save()
+                QueryMessage.objects.create(query=query, author=request.user, body=student_reply)
+                if query.status != "In Progress":
+                    query.status = "In Progress"
+                    query.save(update_fields=["status"])
                 messages.success(request, "Your reply has been sent.")
             elif action == "resolve":
                 query.status = "Resolved"
-                query.save()
+                query.save(update_fields=["status"])
                 messages.success(request, "Query marked as resolved.")
 
         return redirect("query_detail", query_id=query.id)
 
-    return render(request, "queries/query_detail.html", {"query": query})
\ No newline at end of file
+    # Newest page of the thread, shown oldest first; ?before=<id> loads earlier messages.
+    thread = query.messages.select_related("author").order_by("-id")
+    before = request.GET.get("before", "")
+    if before.isdigit():
+        thread = thread.filter(id__lt=before)
+    thread = list(thread[:THREAD_PAGE_SIZE + 1])
+    has_earlier = len(thread) > THREAD_PAGE_SIZE
+    thread = thread[:THREAD_PAGE_SIZE][::-1]
+
+    return render(request, "queries/query_detail.html", {
+        "query": query,
+        "thread": thread,
+        "has_earlier": has_earlier,
+        "live_updates": settings.ASYNC_VIEWS,
+    })
+
+
+# -----------------------------
+# LIVE UPDATES
+# -----------------------------
+@login_required
+async def query_events(request):
+    """
+    Server-sent events with the replies and status changes the user may see,
+    optionally only those of ``?query=<id>``. Needs ASGI to hold many idle
+    streams cheaply; each one is a queue subscription and runs no queries.
+
+    Under WSGI a stream would hold a worker thread for as long as the page
+    is open, so it answers 204 instead, which tells EventSource to give up.
+    """
+    if not settings.ASYNC_VIEWS:
+        return HttpResponse(status=204)
+    user = await request.auser()
+    role = request.role
+    query_id = request.GET.get("query", "")
+    query_id = int(query_id) if query_id.isdigit() else None
+    keepalive = settings.QUERY_EVENTS["KEEPALIVE_SECONDS"]
+
+    async def stream():
+        # Reconnect quickly if the connection drops.
+        yield f"retry: {settings.QUERY_EVENTS['RETRY_MS']}\n\n"
+        async with events.get_broker().subscribe() as queue:
+            event_id = 0
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    # A comment line, so proxies don't close an idle connection.
+                    yield ": keepalive\n\n"
+                    continue
+                if events.can_see(event, user.pk, role, query_id):
+                    event_id += 1
+                    yield events.format_event(event, event_id)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: send events as they come
+    return response
@@ -0,0 +1,169 @@
+"""
+Full-text index over courses, lessons and queries, stored in a SQLite
+FTS5 virtual table (``search_document``, created by migration 0001).
+
+Each indexed object owns a fixed rowid derived from its kind and primary
+key, so updating or removing one document is a rowid lookup rather than
+a scan of the table. Results are ranked with BM25, weighting title
+matches above body matches.
+
+On databases other than SQLite every function here is a no-op and
+searches return no results.
+"""
+
+import re
+
+from django.db import connection, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+TABLE = 'search_document'
+KIND_CODES = {'course': 1, 'lesson': 2, 'query': 3}
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+BATCH_SIZE = 2000
+
+# Private-use markers for snippet(); the surrounding text is escaped before
+# they are turned into <mark> tags.
+_MARK_START, _MARK_END = '\ue000', '\ue001'
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def rowid_for(kind, object_id):
+    return object_id * len(KIND_CODES) + KIND_CODES[kind]
+
+
+def document_for(instance):
+    """Return the index row for a Course, Lesson or Query instance."""
+    kind = instance._meta.model_name
+    if kind == 'course':
+        body, course_id, owner_id = instance.description, instance.pk, instance.teacher_id
+    elif kind == 'lesson':
+        body, course_id, owner_id = instance.content, instance.course_id, None
+    elif kind == 'query':
+        body, course_id, owner_id = instance.description, instance.course_id, instance.created_by_id
+    else:
+        raise ValueError(f"{instance!r} is not searchable")
+    return (rowid_for(kind, instance.pk), instance.title, body or '', kind, instance.pk, course_id, owner_id)
+
+
+def index_documents(instances):
+    if not is_available():
+        return
+    rows = [document_for(instance) for instance in instances]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        # FTS5 has no UPSERT; delete then insert keeps the rowid stable.
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, title, body, kind, object_id, course_id, owner_id) "
+            f"VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def remove_document(instance):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [rowid_for(instance._meta.model_name, instance.pk)])
+
+
+def rebuild(querysets):
+    """Replace the whole index with the objects in ``querysets``; returns the number indexed."""
+    if not is_available():
+        return 0
+    total = 0
+    # One transaction: searches never see a half-built index, and a failure keeps the old one.
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        for queryset in querysets:
+            batch = []
+            for instance in queryset.iterator(chunk_size=BATCH_SIZE):
+                batch.append(instance)
+                if len(batch) >= BATCH_SIZE:
+                    index_documents(batch)
+                    total += len(batch)
+                    batch = []
+            index_documents(batch)
+            total += len(batch)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return total
+
+
+def build_match(text):
+    """
+    Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix. Words are quoted so FTS5 operators in the input are inert.
+    """
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _snippet_html(snippet):
+    return mark_safe(escape(snippet).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>'))
+
+
+def search(text, role=None, user_id=None, limit=20, offset=0):
+    """
+    Return up to ``limit`` hits for ``text`` as dicts, best match first.
+    Queries are only visible to staff and, for students, to their author.
+    Lesson snippets are returned for every hit; ``search.views`` blanks
+    those of lessons the user may not open.
+    """
+    match = build_match(text)
+    if not match or not is_available():
+        return []
+
+    sql = (
+        f"SELECT kind, object_id, course_id, title, "
+        f"snippet({TABLE}, 1, %s, %s, '…', 16) AS snippet, "
+        f"bm25({TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS score "
+        f"FROM {TABLE} WHERE {TABLE} MATCH %s"
+    )
+    params = [_MARK_START, _MARK_END, match]
+    if role is None:
+        sql += " AND kind != 'query'"
+    elif role == 'STUDENT':
+        sql += " AND (kind != 'query' OR owner_id = %s)"
+        params.append(user_id)
+    sql += " ORDER BY score LIMIT %s OFFSET %s"
+    params += [limit, offset]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            {
+                'kind': kind,
+                'object_id': object_id,
+                'course_id': course_id,
+                'title': title,
+                'snippet': _snippet_html(snippet),
+                'score': score,
+            }
+            for kind, object_id, course_id, title, snippet, score in cursor.fetchall()
+        ]
+
+
+def matching_ids(text, kind, limit=1000):
+    """Primary keys of the best-matching objects of one kind (used by the admin)."""
+    match = build_match(text)
+    if not match or not is_available():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT object_id FROM {TABLE} WHERE {TABLE} MATCH %s AND kind = %s "
+            f"ORDER BY bm25({TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) LIMIT %s",
+            [match, kind, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
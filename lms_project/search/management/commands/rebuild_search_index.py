@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course, Lesson
+from queries.models import Query
+from search import index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for courses, lessons and queries."
+
+    def handle(self, *args, **options):
+        if not index.is_available():
+            raise CommandError("Full-text search needs the SQLite FTS5 backend.")
+
+        start = time.monotonic()
+        total = index.rebuild([
+            Course.objects.only('id', 'title', 'description', 'teacher_id'),
+            Lesson.objects.only('id', 'title', 'content', 'course_id').order_by(),
+            Query.objects.only('id', 'title', 'description', 'course_id', 'created_by_id'),
+        ])
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {total} documents in {time.monotonic() - start:.1f}s."
+        ))
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE search_document USING fts5("
+        "title, body, "
+        "kind UNINDEXED, object_id UNINDEXED, course_id UNINDEXED, owner_id UNINDEXED, "
+        "tokenize = 'porter unicode61')"
+    )
+    # Index what already exists; rowid = pk * 3 + kind code (see search.index).
+    schema_editor.execute(
+        "INSERT INTO search_document (rowid, title, body, kind, object_id, course_id, owner_id) "
+        "SELECT id * 3 + 1, title, description, 'course', id, id, teacher_id FROM courses_course"
+    )
+    schema_editor.execute(
+        "INSERT INTO search_document (rowid, title, body, kind, object_id, course_id, owner_id) "
+        "SELECT id * 3 + 2, title, content, 'lesson', id, course_id, NULL FROM courses_lesson"
+    )
+    schema_editor.execute(
+        "INSERT INTO search_document (rowid, title, body, kind, object_id, course_id, owner_id) "
+        "SELECT id * 3 + 3, title, description, 'query', id, course_id, created_by_id FROM queries_query"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS search_document")
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0004_quizattempt_attemptanswer'),
+        ('queries', '0002_alter_query_assigned_to_alter_query_course_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
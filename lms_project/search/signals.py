@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from courses.models import Course, Lesson
+from queries.models import Query
+
+from . import index
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Query)
+def document_saved(sender, instance, **kwargs):
+    index.index_documents([instance])
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Query)
+def document_deleted(sender, instance, **kwargs):
+    index.remove_document(instance)
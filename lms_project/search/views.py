@@ -0,0 +1,66 @@
+from django.shortcuts import render
+from django.urls import reverse
+
+from courses.models import Course, Enrollment
+from . import index
+
+PAGE_SIZE = 20
+
+
+def _result_url(hit):
+    if hit['kind'] == 'course':
+        return reverse('course_detail', args=[hit['object_id']])
+    if hit['kind'] == 'lesson':
+        return reverse('lesson_view', args=[hit['course_id'], hit['object_id']])
+    return reverse('query_detail', args=[hit['object_id']])
+
+
+def _readable_course_ids(request, course_ids):
+    """
+    Which of ``course_ids`` the user may read the lessons of, or None for
+    all of them; the same rules as ``courses.views.lesson_access_error``.
+    """
+    if not request.user.is_authenticated:
+        return set()
+    if request.role == 'STUDENT':
+        return set(Enrollment.objects.filter(student=request.user, course_id__in=course_ids)
+                   .values_list('course_id', flat=True))
+    if request.role == 'TEACHER':
+        return set(Course.objects.filter(teacher=request.user, id__in=course_ids).values_list('id', flat=True))
+    return None
+
+
+def search(request):
+    """Ranked full-text search over courses, lessons and queries."""
+    q = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    # One extra hit tells us whether there is a next page without a COUNT.
+    hits = index.search(
+        q,
+        role=request.role,
+        user_id=request.user.pk,
+        limit=PAGE_SIZE + 1,
+        offset=(page - 1) * PAGE_SIZE,
+    ) if q else []
+    has_next = len(hits) > PAGE_SIZE
+    hits = hits[:PAGE_SIZE]
+
+    # Lesson titles are on the course page for anyone, but their text is
+    # only for those who may open the lesson.
+    lesson_course_ids = {hit['course_id'] for hit in hits if hit['kind'] == 'lesson'}
+    readable = _readable_course_ids(request, lesson_course_ids) if lesson_course_ids else None
+    for hit in hits:
+        hit['url'] = _result_url(hit)
+        if hit['kind'] == 'lesson' and readable is not None and hit['course_id'] not in readable:
+            hit['snippet'] = ''
+
+    return render(request, 'search/results.html', {
+        'q': q,
+        'hits': hits,
+        'page': page,
+        'has_next': has_next,
+    })
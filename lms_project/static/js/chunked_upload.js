@@ -0,0 +1,83 @@
+// Resumable, chunked video uploads for the lesson page.
+//
+// <form data-chunked-upload data-start-url="..."> with a file input, a
+// csrf token and a .progress-bar. The file is sent in CHUNK_SIZE pieces;
+// if the page is reloaded, choosing the same file resumes the upload.
+(function () {
+  var CHUNK_SIZE = 8 * 1024 * 1024;
+
+  function storageKey(form, file) {
+    return 'upload:' + form.dataset.startUrl + ':' + file.name + ':' + file.size;
+  }
+
+  function request(method, url, csrf, body, headers) {
+    headers = Object.assign({'X-CSRFToken': csrf}, headers || {});
+    return fetch(url, {method: method, body: body, headers: headers, credentials: 'same-origin'})
+      .then(function (response) {
+        return response.json().then(function (data) {
+          data.status = response.status;
+          return data;
+        });
+      });
+  }
+
+  function startOrResume(form, file, csrf) {
+    var saved = localStorage.getItem(storageKey(form, file));
+    if (saved) {
+      return request('GET', saved, csrf).then(function (data) {
+        if (data.status === 200) {
+          data.url = saved;
+          return data;
+        }
+        localStorage.removeItem(storageKey(form, file));
+        return startOrResume(form, file, csrf);
+      });
+    }
+    var body = new FormData();
+    body.append('filename', file.name);
+    body.append('size', file.size);
+    return request('POST', form.dataset.startUrl, csrf, body).then(function (data) {
+      localStorage.setItem(storageKey(form, file), data.url);
+      return data;
+    });
+  }
+
+  document.querySelectorAll('form[data-chunked-upload]').forEach(function (form) {
+    var bar = form.querySelector('.progress-bar');
+    var status = form.querySelector('[data-upload-status]');
+
+    form.addEventListener('submit', function (event) {
+      event.preventDefault();
+      var file = form.querySelector('input[type=file]').files[0];
+      if (!file) return;
+      var csrf = form.querySelector('[name=csrfmiddlewaretoken]').value;
+
+      function sendFrom(upload) {
+        var percent = Math.floor(upload.offset / file.size * 100);
+        bar.style.width = percent + '%';
+        bar.textContent = percent + '%';
+        if (upload.complete) {
+          localStorage.removeItem(storageKey(form, file));
+          status.textContent = 'Upload complete; the video is being processed.';
+          return;
+        }
+        var chunk = file.slice(upload.offset, upload.offset + CHUNK_SIZE);
+        return request('POST', upload.url, csrf, chunk, {
+          'Content-Type': 'application/octet-stream',
+          'Upload-Offset': String(upload.offset)
+        }).then(function (data) {
+          if (data.status !== 200 && data.status !== 409) throw new Error(data.error || 'Upload failed.');
+          data.url = upload.url;
+          return sendFrom(data);
+        });
+      }
+
+      status.textContent = 'Uploading…';
+      startOrResume(form, file, csrf)
+        .then(sendFrom)
+        .catch(function (error) {
+          status.textContent = error.message + ' Choose the same file again to resume.';
+        });
+    });
+  });
+})();
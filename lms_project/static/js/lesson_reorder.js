@@ -0,0 +1,78 @@
+// Drag-and-drop lesson reordering on the course page (courses.views.reorder_lesson).
+//
+// <ul data-lesson-list data-reorder-url="..."> with <li data-lesson-id="...">
+// items, each holding a [data-lesson-number]; <form data-lesson-reorder>
+// supplies the csrf token. A drop sends the moved lesson and the one it now
+// follows; if the server refuses, the page reloads to show the saved order.
+(function () {
+  var list = document.querySelector('[data-lesson-list]');
+  var form = document.querySelector('form[data-lesson-reorder]');
+  if (!list || !form) return;
+
+  var csrf = form.querySelector('[name=csrfmiddlewaretoken]').value;
+  var error = document.querySelector('[data-reorder-error]');
+  var dragged = null;
+  var startIndex = -1;
+
+  function items() {
+    return Array.prototype.slice.call(list.querySelectorAll('li[data-lesson-id]'));
+  }
+
+  function renumber() {
+    items().forEach(function (item, i) {
+      item.querySelector('[data-lesson-number]').textContent = i + 1;
+    });
+  }
+
+  function save(item) {
+    var previous = item.previousElementSibling;
+    var body = new FormData();
+    body.append('lesson', item.dataset.lessonId);
+    body.append('after', previous ? previous.dataset.lessonId : '');
+    fetch(list.dataset.reorderUrl, {
+      method: 'POST', body: body, headers: {'X-CSRFToken': csrf}, credentials: 'same-origin'
+    }).then(function (response) {
+      if (!response.ok) throw new Error(response.status);
+    }).catch(function () {
+      if (error) {
+        error.textContent = 'The new order could not be saved; reloading.';
+        error.hidden = false;
+      }
+      setTimeout(function () { window.location.reload(); }, 1500);
+    });
+  }
+
+  items().forEach(function (item) {
+    item.draggable = true;
+    item.style.cursor = 'move';
+
+    item.addEventListener('dragstart', function (e) {
+      dragged = item;
+      startIndex = items().indexOf(item);
+      e.dataTransfer.effectAllowed = 'move';
+      e.dataTransfer.setData('text/plain', item.dataset.lessonId);
+    });
+
+    item.addEventListener('dragover', function (e) {
+      if (!dragged || dragged === item) return;
+      e.preventDefault();
+      var box = item.getBoundingClientRect();
+      var below = e.clientY > box.top + box.height / 2;
+      list.insertBefore(dragged, below ? item.nextElementSibling : item);
+    });
+
+    item.addEventListener('dragend', function () {
+      dragged = null;
+      if (items().indexOf(item) === startIndex) return;
+      renumber();
+      save(item);
+    });
+  });
+
+  list.addEventListener('dragover', function (e) {
+    if (dragged) e.preventDefault();
+  });
+  list.addEventListener('drop', function (e) {
+    e.preventDefault();
+  });
+})();
@@ -0,0 +1,56 @@
+// "Load more" buttons for keyset-paginated lists.
+//
+// <a href="?cursor=..." data-load-more data-url="..." data-cursor="..." data-target="#list" data-template="#row-template">
+//
+// Without JavaScript the link simply opens the next page.
+//
+// Each result from the JSON endpoint is rendered by cloning the <template>:
+//   data-field="name"   -> textContent = result[name]
+//   data-href="name"    -> href = result[name]
+//   data-if="name"      -> removed unless result[name] is truthy
+//   data-unless="name"  -> removed if result[name] is truthy
+(function () {
+  function fill(fragment, item) {
+    fragment.querySelectorAll('[data-if]').forEach(function (el) {
+      if (!item[el.dataset.if]) el.remove();
+    });
+    fragment.querySelectorAll('[data-unless]').forEach(function (el) {
+      if (item[el.dataset.unless]) el.remove();
+    });
+    fragment.querySelectorAll('[data-field]').forEach(function (el) {
+      el.textContent = item[el.dataset.field];
+    });
+    fragment.querySelectorAll('[data-href]').forEach(function (el) {
+      el.setAttribute('href', item[el.dataset.href]);
+    });
+    return fragment;
+  }
+
+  document.querySelectorAll('[data-load-more]').forEach(function (button) {
+    var target = document.querySelector(button.dataset.target);
+    var template = document.querySelector(button.dataset.template);
+
+    button.addEventListener('click', function (event) {
+      event.preventDefault();
+      if (button.classList.contains('disabled')) return;
+      var url = new URL(button.dataset.url, window.location.href);
+      url.searchParams.set('cursor', button.dataset.cursor);
+      button.classList.add('disabled');
+
+      fetch(url, {headers: {'Accept': 'application/json'}, credentials: 'same-origin'})
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+          data.results.forEach(function (item) {
+            target.appendChild(fill(template.content.cloneNode(true), item));
+          });
+          if (data.next_cursor) {
+            button.dataset.cursor = data.next_cursor;
+            button.classList.remove('disabled');
+          } else {
+            button.remove();
+          }
+        })
+        .catch(function () { button.classList.remove('disabled'); });
+    });
+  });
+})();
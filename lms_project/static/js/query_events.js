@@ -0,0 +1,62 @@
+// Live query updates over server-sent events (queries.views.query_events).
+//
+// <div data-query-events data-url="..."> on the page opens the stream.
+//
+// On a query page:
+//   [data-query-thread]        replies are appended here (dropped if already shown)
+//   [data-query-status]        updated on status changes
+// On the query list:
+//   [data-query-row="<id>"] [data-query-status]   updated on status changes
+//   [data-query-notice]        shown when a query that is not on the page changes
+(function () {
+  var root = document.querySelector('[data-query-events]');
+  if (!root || !window.EventSource) return;
+
+  var source = new EventSource(root.dataset.url);
+  var thread = document.querySelector('[data-query-thread]');
+  var notice = document.querySelector('[data-query-notice]');
+
+  function showNotice() {
+    if (notice) notice.classList.remove('d-none');
+  }
+
+  function statusElement(queryId) {
+    var row = document.querySelector('[data-query-row="' + queryId + '"]');
+    return (row || document).querySelector('[data-query-status]');
+  }
+
+  source.addEventListener('reply', function (e) {
+    var reply = JSON.parse(e.data);
+    if (!thread) return showNotice();
+    if (thread.querySelector('[data-message-id="' + reply.id + '"]')) return;
+
+    var card = document.createElement('div');
+    card.className = 'card mb-2' + (reply.from_staff ? ' border-primary' : '');
+    card.dataset.messageId = reply.id;
+    var bodyEl = document.createElement('div');
+    bodyEl.className = 'card-body py-2';
+    var meta = document.createElement('p');
+    meta.className = 'small text-muted mb-1';
+    meta.textContent = (reply.author || (reply.from_staff ? 'Teacher' : 'Student')) + ' · ' + reply.created;
+    var text = document.createElement('div');
+    text.style.whiteSpace = 'pre-wrap';
+    text.textContent = reply.body;
+    bodyEl.appendChild(meta);
+    bodyEl.appendChild(text);
+    card.appendChild(bodyEl);
+    thread.appendChild(card);
+    thread.classList.remove('d-none');
+  });
+
+  source.addEventListener('status', function (e) {
+    var change = JSON.parse(e.data);
+    var el = statusElement(change.query_id);
+    if (el) {
+      el.textContent = change.status;
+    } else {
+      showNotice();
+    }
+  });
+
+  source.addEventListener('created', showNotice);
+})();